@@ -11,7 +11,7 @@ Autores:
 
 Universidade Estadual de Campinas - UNICAMP - 2020
 
-Modificado em: 06/01/2021
+Modificado em: 18/10/2026
 '''
 
 import gurobipy as gp
@@ -21,9 +21,11 @@ from argparse import ArgumentParser
 from gurobipy import GRB
 from FFP import FFP
 from Solution import Solution
+from matrix_model import ffm_matrix
 
 
-def ffm(G: nx.Graph, B: list, D: int, T: int, time: float):
+def ffm(G: nx.Graph, B: list, D: int, T: int, time: float,
+        matrix: bool = False):
     '''
     Firefighter Model (FFM) - modelo de programação linear inteira
     que resolve o FFP de forma exata.
@@ -33,8 +35,13 @@ def ffm(G: nx.Graph, B: list, D: int, T: int, time: float):
             B (list): vértices inicialmente queimados.
             D (int): número de bombeiros disponíveis.
             T (int): limite de iterações.
+            matrix (bool): se verdadeiro, constrói o mesmo modelo pela API
+                matricial do Gurobi (ver matrix_model.py).
     '''
 
+    if matrix:
+        return ffm_matrix(G, B, D, T, time)
+
     # Conjunto e número de vértices
     V = G.nodes
     n = G.number_of_nodes()
@@ -91,6 +98,7 @@ def ffm(G: nx.Graph, B: list, D: int, T: int, time: float):
     # Colocando variáveis no modelo.
     model._b = b
     model._d = d
+    model._T = T
 
     # Retornar modelo
     return model
@@ -11,18 +11,26 @@ Autores:
 
 Universidade Estadual de Campinas - UNICAMP - 2020
 
-Modificado em: 07/01/2021
+Modificado em: 18/10/2026
 '''
 
-from networkx import Graph, all_pairs_shortest_path_length
+from networkx import Graph
 from math import ceil
-
-from M_FFM import m_ffm
+import numpy as np
+
+from callbacks import optimize
+from FireSpread import FireSpread
+from graph_util import BallIndex
+from instance_cache import load_instance
+from M_FFM import m_ffm, set_horizon
+from profiling import Profiler
+from reduction import Reduction
 from Solution import Solution
 
 
 class FFP(object):
-    def __init__(self, D: int, G: Graph = Graph(), B: list = [], T: int = 0):
+    def __init__(self, D: int, G: Graph = Graph(), B: list = [], T: int = 0,
+                 matrix: bool = False, reduce: bool = False):
         # Parâmetro obrigatório
         self.D = D
 
@@ -31,54 +39,199 @@ class FFP(object):
         self.B = B
         self.max_T = T
 
-    def read_input(self, filename: str):
-        ''' Função para carregar uma instância.'''
-        
-        self.B = []
-        self.G = Graph()
-        with open(filename, 'r') as f:
+        # Limite de tempo dos métodos (se None, metade do número de vértices)
+        self.limit = None
+
+        # Construir os modelos pela API matricial do Gurobi
+        self.matrix = matrix
+
+        # Resolver a instância reduzida (ver reduction.py)
+        self.reduce = reduce
+        self._reduction = None
+
+        # Modelo M-FFM reaproveitado entre buscas locais
+        self._ls_model = None
+
+        # Índices de k-bolas, por k
+        self._balls = {}
 
-            # Iterar sobre as linhas do arquivo
-            for (idx, line) in enumerate(f):
-                values = line.split()
+        # Instrumentação (desabilitada por padrão)
+        self.profiler = Profiler(enabled=False)
 
-                # Adicionar vértices de B
-                if idx > 4 and len(values) == 1:
-                    self.B.append(int(values[0]))
+        # Monitor (callback) das resoluções dos modelos, se houver
+        self.monitor = None
 
-                # Adicionar arestas
-                elif len(values) == 2:
-                    self.G.add_edge(int(values[0]), int(values[1]))
+    def read_input(self, filename: str, cache: bool = True):
+        '''
+        Função para carregar uma instância. O grafo, a adjacência compacta e
+        as distâncias ao conjunto B (uma BFS de múltiplas fontes, em vez do
+        caminho mínimo entre todos os pares) não dependem de D e vêm da cache
+        de instâncias: ler a mesma instância para outro D ou outro método
+        não repete esse pré-processamento.
 
-        # Número de vértices e arestas
-        n = self.G.number_of_nodes()
+            Args:
+                filename (str): arquivo da instância.
+                cache (bool): se falso, ignora a cache em disco.
+        '''
+
+        inst = load_instance(filename, disk=cache)
+        self.load(inst.G, inst.B, inst.indptr, inst.indices, inst.dist,
+                  inst.balls)
 
         # Limite de iterações
-        self.max_T = ceil(n / self.D)
+        self.max_T = ceil(self.G.number_of_nodes() / self.D)
+
+    def load(self, G: Graph, B: list, indptr: np.ndarray,
+             indices: np.ndarray, dist, balls: dict = None):
+        '''
+        Carrega o grafo, os vértices inicialmente queimados, a adjacência CSR,
+        o índice de distâncias e, se houver, os índices de k-bolas,
+        descartando o que dependia da instância anterior.
+        '''
 
-        # Calcular caminho mínimo entre todos os pares
-        self.sp_len = dict(all_pairs_shortest_path_length(self.G))
+        self.G = G
+        self.B = list(B)
+        self.indptr, self.indices = indptr, indices
+        self.dist = dist
+        self._balls = {} if balls is None else balls
+        self._ls_model = None
+        self._reduction = None
+
+    def time_limit(self):
+        '''
+        Limite de tempo dos métodos: `limit`, se definido (ex.: na instância
+        reduzida, o da original), ou metade do número de vértices.
+        '''
+
+        if self.limit is not None:
+            return self.limit
+        return self.G.number_of_nodes() / 2
+
+    def reduction(self):
+        '''
+        Retorna a instância reduzida (ver Reduction) para o limite de
+        iterações atual, construída na primeira chamada.
+        '''
+
+        if self._reduction is None or self._reduction.T != self.max_T:
+            self._reduction = Reduction(self)
+
+        return self._reduction
+
+    def ball_index(self, k: int):
+        '''
+        Retorna o índice das k-bolas do grafo, criado na primeira chamada com
+        esse k e compartilhado entre execuções sobre a mesma instância.
+        '''
+
+        index = self._balls.get(k)
+        if index is None:
+            index = self._balls[k] = BallIndex(self.indptr, self.indices, k)
+
+        return index
+
+    def _local_search_model(self, T: int, time_limit: float):
+        '''
+        Retorna o modelo M-FFM usado nas buscas locais. O modelo é construído
+        uma única vez e reaproveitado; só é reconstruído quando uma busca
+        pede um limite de iterações T maior que o do modelo atual.
+        '''
+
+        model = self._ls_model
+        if model is None or model._T < T:
+            if model is not None:
+                model.dispose()
+
+            with self.profiler.timer('model_build'):
+                model = m_ffm(self.G, self.dist, self.B, self.D, T,
+                              time_limit, self.matrix)
+                model.update()
+            self.profiler.count('model_builds')
+            model._d_list = list(model._d.values())
+            self._ls_model = model
+
+        model.Params.TimeLimit = time_limit
+        set_horizon(model, T)
+        return model
+
+    def dispose_local_search_model(self):
+        ''' Libera o modelo das buscas locais, se houver.'''
+        if self._ls_model is not None:
+            self._ls_model.dispose()
+            self._ls_model = None
+
+    def set_mip_start(self, model, sol: Solution, hints: bool = True):
+        '''
+        Carrega a solução `sol` como ponto de partida (MIP start) do modelo e,
+        opcionalmente, como dicas (VarHintVal) para as variáveis d. A
+        trajetória do fogo é obtida simulando o espalhamento a partir de B com
+        as defesas de `sol` nas iterações em que ocorreram, de modo que os
+        valores são viáveis em todo o horizonte do modelo, mesmo que `sol`
+        tenha sido obtida com um limite de iterações menor. As defesas são
+        antes reescalonadas para no máximo D por iteração (ver
+        Solution.schedule), pois uma solução do M-FFM pode ter mais de D
+        defesas em uma iteração, o que a tornaria inviável no FFM (e o corte
+        derivado dela, incorreto).
+
+            Returns:
+                O valor objetivo da solução carregada no modelo.
+        '''
+
+        T = model._T
+
+        # Simular o fogo com as defesas da solução, no máximo D por iteração
+        spread = FireSpread(self.indptr, self.indices, self.B)
+        for defend in sol.schedule(self.D, T):
+            spread.step(defend[spread.state[defend] != FireSpread.BURNED])
+
+        # Iteração a partir da qual cada vértice está queimado/defendido
+        b_its = np.where(spread.state == FireSpread.BURNED, spread.its, T+1)
+        d_its = np.where(spread.state == FireSpread.DEFENDED, spread.its, T+1)
+
+        b, d = model._b, model._d
+        d_start = [float(d_its[v] <= t) for v, t in d.keys()]
+        model.setAttr('Start', list(b.values()),
+                      [float(b_its[v] <= t) for v, t in b.keys()])
+        model.setAttr('Start', list(d.values()), d_start)
+        if hints:
+            model.setAttr('VarHintVal', list(d.values()), d_start)
+
+        # Vértices não queimados no instante considerado pelo objetivo
+        horizon = getattr(model, '_horizon', T)
+        return len(b_its) - int(np.count_nonzero(b_its <= horizon))
 
     def local_search(self, sol: Solution, k: int, sigma: float, f: str,
-                     T: int, time_limit: float):
+                     T: int, time_limit: float, neigh: set = None):
         if (time_limit <= 0):
             return sol
 
-        # Construir grupo de variáveis fixadas.
-        neigh = sol.filter_neighborhood(self, k, sigma, f)
+        # Construir grupo de variáveis fixadas (a vizinhança filtrada pode ser
+        # passada pronta, se já tiver sido calculada).
+        if neigh is None:
+            neigh = sol.filter_neighborhood(self, k, sigma, f)
         N = set(self.G.nodes).difference(neigh)
 
-        # Fixar variáveis d_vt para v \in N e 0 <= t <= T
+        # Liberar todas as variáveis d_vt do modelo e fixar (limite superior
+        # zero) as variáveis d_vt para v \in N (na formulação esparsa, apenas
+        # as que existem no modelo)
         T = min(self.max_T, T)
-        model = m_ffm(self.G, self.sp_len, self.B, self.D, T, time_limit)
-        d = model._d
-        model.addConstrs((
-            d[v, t] == 0 for v in N for t in range(T+1)
-        ))
-        model.update()
+        model = self._local_search_model(T, time_limit)
+        d, d_list = model._d, model._d_list
+        fixed = [x for v in N for x in d.select(v, '*')]
+        model.setAttr('UB', d_list, [1.0] * len(d_list))
+        model.setAttr('UB', fixed, [0.0] * len(fixed))
+
+        # Partir da solução incumbente e parar assim que o limitante superior
+        # provar que não há solução de custo maior que o dela na vizinhança.
+        start_cost = self.set_mip_start(model, sol)
+        model.Params.BestBdStop = start_cost + 0.5
 
         # Resolver M-FFM e retornar solução.
-        model.optimize()
+        optimize(model, self.monitor, stop=False, solve='local_search', T=T,
+                 sigma=round(sigma, 4))
+        self.profiler.solve_event('local_search', model, T=T,
+                                  sigma=round(sigma, 4), free=len(neigh),
+                                  start=start_cost)
         if model.SolCount > 0:
             sol = Solution.vars_to_solution(model, self.G, T)
 
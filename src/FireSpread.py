@@ -0,0 +1,110 @@
+'''
+Projeto Final: Mateurística para o Problema dos Brigadistas.
+
+FireSpread.py: Simulação incremental do espalhamento do fogo.
+
+Disciplina:
+    MC859/MO824 - Pesquisa Operacional.
+Autores:
+    Eduardo Barros Innarelli - RA 170161
+    Victor Ferreira Ferrari  - RA 187890
+
+Universidade Estadual de Campinas - UNICAMP - 2020
+
+Modificado em: 18/10/2026
+'''
+
+import numpy as np
+
+from graph_util import neighbors_of
+
+
+class FireSpread(object):
+    '''
+    Simulação do processo do FFP sobre a adjacência CSR do grafo. Guarda
+    apenas o estado de cada vértice e a fronteira do fogo (vértices queimados
+    na última iteração): como todo vizinho ameaçado é queimado ou defendido
+    na iteração em que é ameaçado, só os vizinhos da fronteira podem estar
+    ameaçados. Assim, cada aresta é examinada no máximo duas vezes e uma
+    simulação completa custa O(n + m).
+    '''
+
+    # Estados dos vértices
+    UNTOUCHED, THREATENED, BURNED, DEFENDED = 0, 1, 2, 3
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, B: list):
+        self.indptr = indptr
+        self.indices = indices
+        self.n = len(indptr) - 1
+
+        B = np.unique(np.asarray(B, dtype=np.int64))
+        self.state = np.full(self.n, self.UNTOUCHED, dtype=np.int8)
+        self.state[B] = self.BURNED
+
+        # Iteração em que cada vértice foi tocado (-1 se intocado)
+        self.its = np.full(self.n, -1, dtype=np.int32)
+        self.its[B] = 0
+
+        self.frontier = B
+        self.num_untouched = self.n - len(B)
+        self.t = 1
+
+        self._th = None
+        self._untouched = np.arange(self.n)
+
+    def threatened(self):
+        '''
+        Retorna, em ordem crescente, os vértices ameaçados na iteração
+        corrente: vizinhos intocados da fronteira do fogo.
+        '''
+
+        if self._th is None:
+            nbrs = neighbors_of(self.indptr, self.indices, self.frontier)
+            th = np.unique(nbrs[self.state[nbrs] == self.UNTOUCHED])
+            self.state[th] = self.THREATENED
+            self._th = th
+
+        return self._th
+
+    def untouched(self):
+        '''
+        Retorna, em ordem crescente, os vértices intocados e não ameaçados. A
+        lista é compactada sob demanda, removendo os vértices tocados.
+        '''
+
+        u = self._untouched
+        self._untouched = u[self.state[u] == self.UNTOUCHED]
+        return self._untouched
+
+    def step(self, defend):
+        '''
+        Executa uma iteração: defende os vértices em `defend` e queima os
+        vértices ameaçados que não foram defendidos.
+
+            Returns:
+                Os vértices queimados nesta iteração.
+        '''
+
+        th = self.threatened()
+        defend = np.asarray(defend, dtype=np.int64)
+
+        # Intocados (não ameaçados) defendidos também deixam de ser intocados
+        self.num_untouched -= len(th) + \
+            np.count_nonzero(self.state[defend] == self.UNTOUCHED)
+
+        self.state[defend] = self.DEFENDED
+        burn = th[self.state[th] == self.THREATENED]
+        self.state[burn] = self.BURNED
+
+        self.its[defend] = self.t
+        self.its[burn] = self.t
+
+        # Atualizar fronteira
+        self.frontier = burn
+        self._th = None
+        self.t += 1
+
+        return burn
+
+    def burned(self):
+        return np.flatnonzero(self.state == self.BURNED)
@@ -11,7 +11,7 @@ Autores:
 
 Universidade Estadual de Campinas - UNICAMP - 2020
 
-Modificado em: 07/01/2021
+Modificado em: 18/10/2026
 '''
 
 import gurobipy as gp
@@ -19,23 +19,49 @@ import networkx as nx
 
 from argparse import ArgumentParser
 from gurobipy import GRB
+from graph_util import DistanceIndex
+from matrix_model import m_ffm_matrix
 
 
-def m_ffm(G: nx.Graph, sp_len: dict, B: list, D: int, T: int, time: float):
+def m_ffm(G: nx.Graph, dist: DistanceIndex, B: list, D: int, T: int,
+          time: float, matrix: bool = False):
     '''
     Modified Firefighter Model (M-FFM) - modelo de programação linear inteira
-    que resolve o FFP de forma exata.
+    que resolve o FFP de forma exata, em formulação esparsa (as variáveis
+    b[v, t] e d[v, t] só existem para os pares (v, t) em que não têm valor
+    conhecido a priori).
 
         Args:
             G (networkx.Graph): o grafo de entrada.
+            dist (DistanceIndex): distâncias dos vértices ao conjunto B.
             B (list): vértices inicialmente queimados.
             D (int): número de bombeiros disponíveis.
             T (int): limite de iterações.
+            matrix (bool): se verdadeiro, constrói o mesmo modelo pela API
+                matricial do Gurobi (ver matrix_model.py).
     '''
 
+    if matrix:
+        return m_ffm_matrix(G, B, D, T, time, dist.to_B)
+
     # Conjunto e número de vértices
-    V = G.nodes
     n = G.number_of_nodes()
+    B = set(B)
+    to_B = dist.to_B.tolist()
+
+    # Formulação esparsa: variáveis cujo valor é conhecido não são criadas.
+    # Vértices de B estão sempre queimados, nenhum vértice é defendido no
+    # instante 0 e v só pode ser queimado a partir do instante t >= d(v, B),
+    # onde d(v, B) representa o menor caminho entre v e o conjunto B. Assim,
+    # vértices com d(v, B) > T nunca são queimados e não precisam de
+    # variáveis: R é o conjunto dos vértices que podem queimar até T.
+    #
+    # Não há um limite superior de tempo por vértice além de T: as defesas
+    # podem desviar o fogo por caminhos mais longos que d(v, B), então v pode
+    # queimar em qualquer instante de d(v, B) a T (o único limite geral, o
+    # tamanho da componente de v, é maior que T em grafos conexos). O fim do
+    # horizonte só é cortado para os vértices com d(v, B) > T.
+    R = [v for v in G.nodes if v not in B and to_B[v] <= T]
 
     # Inicializar modelo
     model = gp.Model('m-ffm')
@@ -43,66 +69,88 @@ def m_ffm(G: nx.Graph, sp_len: dict, B: list, D: int, T: int, time: float):
 
     # Variáveis binárias:
     # - b[v, t]: indica se o vértice v está queimado (1) ou não (0) no inst. t
-    b = model.addVars(n, T+1, vtype=GRB.BINARY, name="b")
+    #   (v em R, d(v, B) <= t <= T);
+    b = model.addVars(((v, t) for v in R for t in range(to_B[v], T+1)),
+                      vtype=GRB.BINARY, name="b")
     # - d[v, t]: indica se o vértice v está salvo (1) ou não (0) no instante t
-    d = model.addVars(n, T+1, vtype=GRB.BINARY, name="d")
+    #   (v em R, 1 <= t <= T).
+    d = model.addVars(((v, t) for v in R for t in range(1, T+1)),
+                      vtype=GRB.BINARY, name="d")
 
     # Objetivo: maximizar quantidade de vértices salvos no instante T
-    model.setObjective(n - gp.quicksum(b[v, T] for v in V), GRB.MAXIMIZE)
+    model.setObjective(n - len(B) - gp.quicksum(b[v, T] for v in R),
+                       GRB.MAXIMIZE)
 
     # Restrições:
 
     # - cada vizinho v_n de um vértice v queimado na iteração t-1 deve ser ou
-    #   queimado ou defendido na iteração t;
+    #   queimado ou defendido na iteração t (vértices de B estão queimados
+    #   desde o instante 0, e v_n só pode estar queimado a partir de d(v_n, B));
     model.addConstrs((
-        b[v, t] + d[v, t] - b[v_n, t-1] >= 0
-        for v in V
-        for v_n in G.adj[v]
+        b[v, t] + d[v, t] >= 1
+        for v in R
+        for v_n in G.adj[v] if v_n in B
         for t in range(1, T+1)
     ))
+    model.addConstrs((
+        b[v, t] + d[v, t] - b[v_n, t-1] >= 0
+        for v in R
+        for v_n in G.adj[v] if v_n not in B
+        for t in range(to_B[v_n]+1, T+1)
+    ))
 
     # - um vértice v não é queimado e defendido no instante t;
     model.addConstrs((
-        b[v, t] + d[v, t] <= 1 for v in V for t in range(1, T+1)
+        b[v, t] + d[v, t] <= 1 for v in R for t in range(to_B[v], T+1)
     ))
 
     # - um vértice queimado ou protegido permanece nesse estado nas iterações
     #   seguintes;
     model.addConstrs((
-        b[v, t] - b[v, t-1] >= 0 for v in V for t in range(1, T+1)
+        b[v, t] - b[v, t-1] >= 0 for v in R for t in range(to_B[v]+1, T+1)
     ))
     model.addConstrs((
-        d[v, t] - d[v, t-1] >= 0 for v in V for t in range(1, T+1)
+        d[v, t] - d[v, t-1] >= 0 for v in R for t in range(2, T+1)
     ))
 
     # - limitar o número de vértices defendidos em t por t*D. Essa restrição é
     #   relaxada da original e permite a alocação de bombeiros adicionais, mas
     #   isso não impacta no custo e é possível viabilizar a solução em tempo
     #   polinomial;
-    model.addConstrs((d.sum('*', t) <= t*D for t in range(1, T+1)))
-
-    # - inicializar variáveis no instante 0 (vértices de B queimados e nenhum
-    #   defendido);
-    model.addConstrs((b[v, 0] == 1 for v in B))
-    model.addConstrs((b[v, 0] == 0 for v in set(V).difference(set(B))))
-    model.addConstrs((d[v, 0] == 0 for v in V))
+    if R:
+        model.addConstrs((d.sum('*', t) <= t*D for t in range(1, T+1)))
 
-    # - um vértice v só pode ser queimado a partir do instante t >= d(v, B),
-    #   onde d(v, B) representa o menor caminho entre v e o conjunto B.
-    model.addConstrs((
-        b[v, t] == 0
-        for v in set(V).difference(set(B))
-        for t in range(1, min(T+1, min([sp_len[v][b] for b in B])))
-    ))
-
-    # Colocando variáveis no modelo.
+    # Colocando variáveis no modelo (e o instante usado no objetivo). Os
+    # vértices de B não têm variáveis e estão sempre queimados.
     model._b = b
     model._d = d
+    model._T = T
+    model._horizon = T
+    model._burned = sorted(B)
 
     # Retornar modelo
     return model
 
 
+def set_horizon(model: gp.Model, T: int):
+    '''
+    Altera o instante considerado no objetivo de um modelo construído com
+    limite de iterações model._T >= T, passando a maximizar os vértices
+    salvos no instante T. As iterações seguintes a T não alteram o ótimo: o
+    fogo pode continuar se espalhando sem afetar o objetivo.
+    '''
+
+    if model._horizon == T:
+        return
+
+    b = model._b
+    prev = b.select('*', model._horizon)
+    curr = b.select('*', T)
+    model.setAttr('Obj', prev, [0.0] * len(prev))
+    model.setAttr('Obj', curr, [-1.0] * len(curr))
+    model._horizon = T
+
+
 if __name__ == '__main__':
 
     # Argumentos da linha de comando
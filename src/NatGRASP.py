@@ -11,24 +11,93 @@ Autores:
 
 Universidade Estadual de Campinas - UNICAMP - 2020
 
-Modificado em: 07/01/2021
+Modificado em: 18/10/2026
 '''
 
 from argparse import ArgumentParser
+from collections.abc import Sequence
 from math import ceil, inf
+from multiprocessing import Pool
 from random import sample, seed
 from time import time
 from types import FunctionType
 from os.path import exists, split
 
-from Solution import Solution
+import numpy as np
+
+from Solution import Solution, UniqueSolutions, neighborhood_distances
 from FFP import FFP
+from FireSpread import FireSpread
 from f_desc import num_of_descendants
 
+# Iterações por bloco da construção paralela. Os blocos (e suas sementes)
+# dependem apenas de eta e da semente, e não do número de processos.
+CHUNK_SIZE = 250
+
+
+class _RankedCandidates(Sequence):
+    '''
+    Lista de candidatos rankeados da heurística construtiva, truncada em
+    `size`: primeiro os vértices ameaçados, depois os demais intocados, ambos
+    em ordem crescente. Os elementos são obtidos sob demanda, então apenas os
+    vértices sorteados são materializados.
+    '''
+
+    def __init__(self, spread: FireSpread, size: int):
+        self.spread = spread
+        self.size = size
+        self.th = spread.threatened()
+        self._rest = None
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, j: int):
+        if not 0 <= j < self.size:
+            raise IndexError(j)
+
+        if j < len(self.th):
+            return int(self.th[j])
+
+        if self._rest is None:
+            self._rest = self.spread.untouched()
+        return int(self._rest[j - len(self.th)])
+
+
+# Instância da mateurística em cada processo da construção paralela. O
+# problema é recebido uma única vez por processo e usado somente para leitura.
+_worker_grasp = None
+
+
+def _init_construction_worker(ffp: FFP, k: int):
+    global _worker_grasp
+    _worker_grasp = NatGRASP(ffp, k, None, 0, 0, 0)
+
+
+def _construction_worker(job: tuple):
+    '''
+    Executa um bloco de iterações da heurística construtiva com sua própria
+    semente, até o prazo `deadline`, e retorna o número de iterações feitas
+    e os resumos das soluções únicas.
+    '''
+    entropy, alpha, iterations, deadline = job
+    seed(entropy)
+
+    # Soluções repetidas no bloco não são transferidas
+    S = UniqueSolutions()
+    done = 0
+    for _ in range(iterations):
+        if time() >= deadline:
+            break
+        S.add(_worker_grasp.constructive_heuristic_th(alpha))
+        done += 1
+
+    return done, [sol.summary() for sol in S]
+
 
 class NatGRASP(object):
     def __init__(self, ffp: FFP, k: int, f: FunctionType, eps: float,
-                 time_limit: float, start_time: float):
+                 time_limit: float, start_time: float, bound: float = inf):
         self.ffp = ffp
         self.k = k
         self.f = f
@@ -36,6 +105,10 @@ class NatGRASP(object):
         self.limit = time_limit
         self.start_time = start_time
 
+        # Limitante superior do custo: uma solução que o atinge é ótima e
+        # encerra a busca local
+        self.bound = bound
+
     def constructive_heuristic_th(self, alpha: float):
         '''
         Heurística construtiva Th executada no modo probabilístico, onde em
@@ -49,69 +122,107 @@ class NatGRASP(object):
                 A solução com os vértices defendidos, queimados e o custo.
         '''
 
-        B = self.ffp.B
         D = self.ffp.D
         G = self.ffp.G
-        n = G.number_of_nodes()
-
-        # Inicialmente defendidos e queimados
-        defended = set()
-        burned = set(B)
 
-        # Conjunto de vértices intocados
-        U = set(G.nodes - B)
-
-        # Registrar iterações em que um vértice é "tocado" (defendido ou
-        # queimado)
-        its = [0 if v in burned else inf for v in range(n)]
-        t = 1
+        # Simulação do fogo a partir de B (vértices inicialmente queimados)
+        spread = FireSpread(self.ffp.indptr, self.ffp.indices, self.ffp.B)
 
         # Tentar executar enquanto houver vértices intocados
-        while len(U) > 0:
+        while spread.num_untouched > 0:
 
-            # Os vértices ameaçados são os vizinhos dos vértices queimados que
-            # não estão defendidos ou queimados
-            th = set()
-            for b in burned:
-                th.update([
-                    v_n for v_n in G.adj[b]
-                    if v_n not in defended.union(burned)
-                ])
+            # Os vértices ameaçados são os vizinhos intocados dos vértices
+            # queimados na iteração anterior
+            th = spread.threatened()
 
             # Se não houver vértices ameaçados, todos estão queimados,
             # defendidos ou salvos
             if len(th) == 0:
                 break
 
-            # Rankear candidatos (maior prioridade aos ameaçados)
-            ranked = list(th) + list(U - th)
-
-            # Construir lista de candidatos restritos (RCL)
-            RCL = ranked[:ceil(alpha * len(ranked))]
+            # Construir lista de candidatos restritos (RCL) a partir dos
+            # candidatos rankeados (maior prioridade aos ameaçados)
+            RCL = _RankedCandidates(spread, ceil(alpha * spread.num_untouched))
 
             # Defender até D vértices da RCL
             defend = sample(RCL, D if D < len(RCL) else len(RCL))
 
-            # Queimar vértices ameaçados não defendidos
-            burn = th - set(defend)
-
-            # Atualizar iterações
-            for v in burn.union(defend):
-                its[v] = t
-            t += 1
-
-            # Atualizar conjuntos
-            U -= th.union(defend)
-            defended.update(defend)
-            burned.update(burn)
+            # Queimar vértices ameaçados não defendidos e atualizar iterações
+            spread.step(defend)
 
         # Construir e retornar solução
-        sol = Solution(defended=defended, burned=burned,
-                       iterations=its, T=t)
+        sol = Solution(defended=spread.state == FireSpread.DEFENDED,
+                       burned=spread.state == FireSpread.BURNED,
+                       iterations=spread.its, T=spread.t)
         sol.calculate_cost(G)
-        sol.construct_full_neighborhood(self.k, G)
+        sol.construct_full_neighborhood(self.k, self.ffp)
         return sol
 
+    def construction(self, alpha: float, eta: int, workers: int = 1,
+                     seed_number: int = 0):
+        '''
+        Fase construtiva do GRASP: executa a heurística construtiva até `eta`
+        vezes, até metade do limite de tempo ou até construir uma solução que
+        atinja o limitante superior, gerando as soluções construídas (ao
+        menos uma, mesmo que o prazo já tenha passado). Com mais de um
+        processo, as iterações são divididas em blocos de CHUNK_SIZE, cada um
+        com uma semente própria derivada de `seed_number` e do índice do
+        bloco, e os processos devolvem apenas resumos compactos das soluções.
+        Assim, as soluções construídas não dependem de `workers` (exceto
+        quando o prazo interrompe a construção).
+
+            Args:
+                alpha       (float): parâmetro alpha da heurística construtiva.
+                eta         (int): número máximo de iterações.
+                workers     (int): número de processos.
+                seed_number (int): semente das sequências aleatórias de cada
+                    bloco (apenas no modo paralelo; no modo sequencial é usado
+                    o gerador global, já semeado).
+        '''
+
+        # Critério de parada 2: metade do limite de tempo alcançado
+        deadline = self.start_time + self.limit / 2
+        profiler = self.ffp.profiler
+
+        if workers <= 1:
+
+            # Critério de parada 1: eta iterações (ou uma solução que atinge o
+            # limitante superior)
+            for i in range(eta):
+                if i > 0 and time() >= deadline:
+                    break
+                profiler.count('construction_iterations')
+                sol = self.constructive_heuristic_th(alpha)
+                yield sol
+                if sol.cost >= self.bound:
+                    break
+            return
+
+        # Dividir as iterações em blocos de tamanho fixo, com sementes
+        # independentes dadas por (seed_number, índice do bloco)
+        jobs = []
+        for i, first in enumerate(range(0, eta, CHUNK_SIZE)):
+            ss = np.random.SeedSequence(seed_number, spawn_key=(i,))
+            jobs.append((int(ss.generate_state(1)[0]), alpha,
+                         min(CHUNK_SIZE, eta - first), deadline))
+
+        found = False
+        with Pool(workers, _init_construction_worker,
+                  (self.ffp, self.k)) as pool:
+            for done, summaries in pool.imap(_construction_worker, jobs):
+                profiler.count('construction_iterations', done)
+                sols = [Solution.from_summary(summary)
+                        for summary in summaries]
+                found = found or len(sols) > 0
+                yield from sols
+                if any(sol.cost >= self.bound for sol in sols):
+                    break
+
+        # Prazo alcançado antes de qualquer iteração: construir uma solução
+        if not found:
+            profiler.count('construction_iterations')
+            yield self.constructive_heuristic_th(alpha)
+
     def pool_selection(self, S: set, rho: int):
         '''
         Método que seleciona um pool de tamanho `rho` do conjunto de soluções
@@ -120,7 +231,7 @@ class NatGRASP(object):
         PLI.
 
             Args:
-                S   (set): conjunto de soluções únicas geradas pela heurística
+                S   (UniqueSolutions): soluções únicas geradas pela heurística
                     construtiva.
                 rho (int): tamanho desejado do pool.
             Returns:
@@ -128,40 +239,38 @@ class NatGRASP(object):
         '''
 
         S = sorted(S, key=lambda s: s.cost)
+        cost = np.array([s.cost for s in S])
 
         # Criar vetor q de quartis q1, q2, q3 e q4 de S
         # https://pt.wikipedia.org/wiki/Quartil
         n = len(S)
-        q = [
-            S[n // 4].cost,  # q1
-            (S[n // 2].cost + S[(n + 1) // 2].cost) / 2 \
-            if n % 2 == 0 else S[n // 2].cost,  # q2
-            S[3*n // 4].cost,  # q3
-            S[-1].cost  # q4
-        ]
+        q = np.array([
+            cost[n // 4],  # q1
+            (cost[n // 2] + cost[(n + 1) // 2]) / 2 \
+            if n % 2 == 0 else cost[n // 2],  # q2
+            cost[3*n // 4],  # q3
+            cost[-1]  # q4
+        ])
 
         # Subconjuntos Si com soluções de S (menos a melhor) distribuidas entre
-        # os quartis
+        # os quartis: Si contém as soluções com q[i-1] < custo <= q[i] (podem
+        # haver quartis iguais; o último conjunto recebe as demais)
         best = S.pop()
-        Si = [[], [], [], []]
-        i = 0
-        for s in S:
-            # Obs: podem haver quartis iguais, por isso o while
-            while s.cost > q[i] and i < 3:
-                i += 1
-            Si[i].append(s)
-
-        # Iniciar pool e armazenar vizinhanças
+        Si = np.minimum(np.searchsorted(q, cost[:-1], side='left'), 3)
+
+        # Diferença simétrica da vizinhança de cada solução em relação à
+        # vizinhança da melhor, calculada uma única vez
+        dist = neighborhood_distances(S, best)
+
+        # Iniciar pool (índices das soluções em S)
         pool = []
-        n_s = {s: s.neighborhood for s in S}
-        n_best = best.neighborhood
 
         # Pseudocodigo começa aqui:
         # Para cada Si (ao contrário), adiciona no pool até "rho-1" elementos.
         # Em seguida, verifica diversidade, substituindo os elementos
         # menos diversos até acabar o último conjunto.
         for i in range(4)[::-1]:
-            for s in Si[i]:
+            for s in np.flatnonzero(Si == i).tolist():
 
                 # Adicionar as primeiras rho-1 soluções visitadas ao pool
                 if len(pool) < rho-1:
@@ -169,15 +278,13 @@ class NatGRASP(object):
 
                 else:
                     # Solução do pool com menor diferença simétrica da
-                    # vizinhança em relação a n_best
-                    old_s = min(pool, key=lambda x: len(
-                        n_s[x].symmetric_difference(n_best)))
+                    # vizinhança em relação à melhor
+                    old_s = min(pool, key=lambda x: dist[x])
 
-                    # Se a diferença simétrica da vizinhanaça de s em rel. a
-                    # n_best for maior que a de old_s, substituir old_s por s
+                    # Se a diferença simétrica da vizinhanaça de s em rel. à
+                    # melhor for maior que a de old_s, substituir old_s por s
                     # no pool
-                    if len(n_s[s].symmetric_difference(n_best)) > \
-                            len(n_s[old_s].symmetric_difference(n_best)):
+                    if dist[s] > dist[old_s]:
                         pool.remove(old_s)
                         pool.append(s)
 
@@ -185,7 +292,7 @@ class NatGRASP(object):
             if len(pool) == rho-1:
                 break
 
-        return pool, best
+        return [S[s] for s in pool], best
 
     def neighborhood_update(self, sigma: float, solution: Solution):
         return min(1, sigma+0.1) if solution.optimal else max(0, sigma-0.1)
@@ -210,8 +317,11 @@ class NatGRASP(object):
         sigma, rho = 0.5, len(pool)
         local_time = (self.limit - curr_time)/2
 
-        # Explorar pool de soluções (exceto a melhor)
+        # Explorar pool de soluções (exceto a melhor), até que a incumbente
+        # atinja o limitante superior
         for s in pool:
+            if inc_sol.cost >= self.bound:
+                return inc_sol
             sol_time = (self.limit - curr_time - local_time)/rho
 
             # Busca local com T iterações
@@ -226,13 +336,18 @@ class NatGRASP(object):
             curr_time = time() - self.start_time
 
         # Explorar melhor solução (agora com vizinhança adaptada)
+        if inc_sol.cost >= self.bound:
+            return inc_sol
         T = ceil((1+self.eps)*best_sol.T)
         curr_sol = problem.local_search(best_sol, self.k, sigma, self.f,
                                         T, local_time)
         inc_sol = curr_sol if curr_sol.cost > inc_sol.cost else inc_sol
         curr_time = time() - self.start_time
+        if inc_sol.cost >= self.bound:
+            return inc_sol
 
-        return self.intensification(problem, sigma, inc_sol, curr_time)
+        with problem.profiler.timer('intensification'):
+            return self.intensification(problem, sigma, inc_sol, curr_time)
 
     def intensification(self, problem: FFP, sigma: float,
                         best_sol: Solution, curr_time: float):
@@ -240,7 +355,8 @@ class NatGRASP(object):
             Função de intensificação de busca da mateurística baseada no
             GRASP. Realiza uma série de buscas locais em cima da melhor
             solução, com diferentes valores de "sigma" para busca local.
-            Early stopping em caso de convergência.
+            Early stopping em caso de convergência ou se a melhor solução
+            atingir o limitante superior.
 
                 Args:
                     problem    (FFP): O problema a ser resolvido.
@@ -255,14 +371,16 @@ class NatGRASP(object):
         prev_sig = sigma
 
         # Consecutivas buscas locais na melhor solução.
-        while(curr_time < self.limit):
+        while(curr_time < self.limit and best_sol.cost < self.bound):
+            problem.profiler.count('intensification_rounds')
             N_prev = prev_sol.filter_neighborhood(problem, self.k, prev_sig,
                                                   self.f)
 
             # Busca local com T iterações
             T = ceil((1+self.eps)*prev_sol.T)
             curr_sol = problem.local_search(prev_sol, self.k, prev_sig,
-                                            self.f, T, self.limit - curr_time)
+                                            self.f, T, self.limit - curr_time,
+                                            N_prev)
             best_sol = curr_sol if curr_sol.cost > best_sol.cost else best_sol
 
             # Atualizar sigma
@@ -293,6 +411,7 @@ if __name__ == "__main__":
     parser = ArgumentParser(add_help=False)
     parser.add_argument('--input-file', type=str, required=True)
     parser.add_argument('--D', type=int, required=True)
+    parser.add_argument('--workers', type=int, default=1)
     args = parser.parse_args()
 
     if not exists(args.input_file):
@@ -306,7 +425,7 @@ if __name__ == "__main__":
     k = 2
     f = num_of_descendants
     eps = 0.5
-    limit = ffp.G.number_of_nodes() / 2
+    limit = ffp.time_limit()
     alpha = 0.3
     eta = 11000
     rho = 4
@@ -317,26 +436,10 @@ if __name__ == "__main__":
     start_time = time()
     method = NatGRASP(ffp, k, f, eps, limit, start_time)
 
-    # PASSO 1: Construção
-    S = dict()
-
-    # Critério de parada 1: eta iterações
-    for _ in range(eta):
-
-        # Critério de parada 2: metade do limite de tempo alcançado
-        if time() - method.start_time >= method.limit / 2:
-            break
-
-        curr = method.constructive_heuristic_th(alpha)
-        neigh_key = str(sorted(curr.neighborhood))
-
-        # Armazenar solução corrente se não tiver sido encontrada nenhuma
-        # solução com a mesma vizinhança ou se a encontrada tiver menor custo
-        if neigh_key not in S.keys() or curr.cost > S[neigh_key].cost:
-            S[neigh_key] = curr
-
-    # Converter S em lista de soluções
-    S = list(S.values())
+    # PASSO 1: Construção (armazenando apenas a melhor solução de cada
+    # vizinhança)
+    S = UniqueSolutions(method.construction(alpha, eta, args.workers,
+                                            seed_number))
 
     # PASSO 2: Seleção
     P, best = method.pool_selection(S, rho)
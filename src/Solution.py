@@ -11,70 +11,177 @@ Autores:
 
 Universidade Estadual de Campinas - UNICAMP - 2020
 
-Modificado em: 07/01/2021
+Modificado em: 18/10/2026
 '''
 
-from networkx import Graph, single_source_shortest_path
-from math import ceil, inf
+import numpy as np
+from networkx import Graph
+from math import ceil, inf, isfinite
 from types import FunctionType
 from gurobipy import Model, GRB
 
 
+# Número de bits 1 em cada byte, para contar elementos de conjuntos
+# representados como vetores de bits empacotados
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
 class Solution(object):
-    def __init__(self, defended: set, burned: set, iterations: list,
-                 T: int, cost: int = 0, optimal: bool = True):
-        self.defended = defended
-        self.burned = burned
-        self.iterations = iterations
+    '''
+    Solução do FFP em representação compacta: os conjuntos de vértices
+    (defendidos, queimados, k-vizinhança e vizinhança completa) são vetores de
+    bits empacotados (np.packbits, n/8 bytes cada) e as iterações um vetor de
+    inteiros pequenos, com -1 para vértices intocados. Os atributos
+    `defended`, `burned`, `kn`, `neighborhood` e `iterations` continuam
+    disponíveis como conjuntos/listas, decodificados sob demanda.
+    '''
+
+    __slots__ = ('n', 'T', 'cost', 'optimal', 'its', 'defended_bits',
+                 'burned_bits', 'kn_bits', 'neighborhood_bits', 'gap',
+                 '_ranking')
+
+    def __init__(self, defended, burned, iterations, T: int, cost: int = 0,
+                 optimal: bool = True, gap: float = None):
+        '''
+            Args:
+                defended   (set | np.ndarray): vértices defendidos (ou máscara
+                           booleana de tamanho n).
+                burned     (set | np.ndarray): vértices queimados (idem).
+                iterations (list | np.ndarray): iteração em que cada vértice
+                           foi tocado (inf ou -1 se intocado).
+                gap        (float): gap de otimalidade informado pelo Gurobi
+                           (None se a solução não vem de um modelo).
+        '''
+
+        if not isinstance(iterations, np.ndarray):
+            iterations = [-1 if t == inf else t for t in iterations]
+        its = np.asarray(iterations)
+
+        self.n = len(its)
+        self.its = its.astype(np.int16 if its.size == 0 or its.max() <
+                              np.iinfo(np.int16).max else np.int32)
+        self.defended_bits = _pack(defended, self.n)
+        self.burned_bits = _pack(burned, self.n)
         self.T = T
         self.cost = cost
         self.optimal = optimal
-        self.kn = None
-        self.neighborhood = None
+        self.gap = gap
+        self.kn_bits = None
+        self.neighborhood_bits = None
+        self._ranking = None
+
+    @ property
+    def defended(self):
+        return _unpack_set(self.defended_bits, self.n)
+
+    @ property
+    def burned(self):
+        return _unpack_set(self.burned_bits, self.n)
+
+    @ property
+    def kn(self):
+        return None if self.kn_bits is None else \
+            _unpack_set(self.kn_bits, self.n)
+
+    @ property
+    def neighborhood(self):
+        return None if self.neighborhood_bits is None else \
+            _unpack_set(self.neighborhood_bits, self.n)
+
+    def defended_vertices(self):
+        ''' Vetor ordenado dos vértices defendidos.'''
+        return np.flatnonzero(_unpack(self.defended_bits, self.n))
+
+    def burned_vertices(self):
+        ''' Vetor ordenado dos vértices queimados.'''
+        return np.flatnonzero(_unpack(self.burned_bits, self.n))
+
+    def schedule(self, D: int, T: int):
+        '''
+        Defesas da solução por iteração, com no máximo D por iteração. O
+        M-FFM limita apenas o total de defesas até cada iteração t (t*D),
+        então uma iteração pode ter mais de D defesas, o que é inviável no
+        FFM; antecipar as defesas, em ordem de iteração, para o primeiro
+        instante com bombeiro livre respeita o limite e não queima nenhum
+        vértice a mais (um vértice defendido em t está intocado ou ameaçado
+        antes de t).
+
+            Returns:
+                Lista com os vértices defendidos em cada iteração 1, ..., T.
+        '''
+
+        defended = self.defended_vertices()
+        order = defended[np.argsort(self.its[defended], kind='stable')]
+
+        return [order[t*D:(t+1)*D] for t in range(T)]
+
+    @ property
+    def iterations(self):
+        return [t if t >= 0 else inf for t in self.its.tolist()]
 
     def calculate_cost(self, G: Graph):
-        self.cost = len(set(G.nodes).difference(self.burned))
+        self.cost = G.number_of_nodes() - popcount(self.burned_bits)
 
-    def _construct_k_neighborhood(self, k: int, G: Graph):
+    def _construct_k_neighborhood(self, k: int, ffp):
         '''
         Função que constrói todas as k-vizinhanças dos vértices defendidos na
-        solução.
+        solução, como a união das k-bolas (guardadas no índice de `ffp`) dos
+        vértices defendidos.
 
             Args:
-                k (int): profundidade da vizinhança.
-                G (Graph): o grafo de entrada.
+                k   (int): profundidade da vizinhança.
+                ffp (FFP): instância do problema sendo resolvida.
         '''
 
-        # Conjunto de todas as k-vizinhanças
-        kn = set()
-
-        for d in self.defended:
+        kn = ffp.ball_index(k).union(self.defended_vertices().tolist())
 
-            kn.update(
-                # Menores caminhos de profundidade k (as chaves retornam os
-                # destinos)
-                v_n for v_n in list(single_source_shortest_path(G, d, k)
-                                    .keys())
-                # Ignorar vértices defendidos
-                if v_n not in self.defended
-            )
+        # Ignorar vértices defendidos
+        self.kn_bits = kn & ~self.defended_bits
 
-        self.kn = kn
-
-    def construct_full_neighborhood(self, k: int, G: Graph):
+    def construct_full_neighborhood(self, k: int, ffp):
         '''
         Função que constrói a k-vizinhança completa unida com os vértices
         defendidos, usada como identificador de solução única.
 
             Args:
-                k (int): profundidade da vizinhança.
-                G (Graph): o grafo de entrada.
+                k   (int): profundidade da vizinhança.
+                ffp (FFP): instância do problema sendo resolvida.
+        '''
+
+        if self.kn_bits is None:
+            self._construct_k_neighborhood(k, ffp)
+
+        self.neighborhood_bits = self.kn_bits | self.defended_bits
+
+    def ranked_neighborhood(self, ffp, k: int, f: FunctionType):
+        '''
+        Função que retorna a k-vizinhança (vetor de vértices) ordenada de
+        forma decrescente pelo critério f. O ranking é guardado na solução,
+        de modo que filtrar a mesma solução com outro sigma (mesmos k e f)
+        não repete a pontuação.
         '''
 
-        if self.kn is None:
-            self._construct_k_neighborhood(k, G)
+        if self._ranking is not None and self._ranking[:2] == (k, f):
+            return self._ranking[2]
+
+        # Construir k-vizinhanças, se preciso
+        if self.kn_bits is None:
+            self._construct_k_neighborhood(k, ffp)
+
+        # Pontuar k-vizinhanças usando função f (em lote, se possível)
+        kn = np.flatnonzero(_unpack(self.kn_bits, self.n)).tolist()
+        batch = getattr(f, 'batch', None)
+        if batch is not None:
+            scores = np.asarray(batch(self, ffp, kn))
+        else:
+            scores = np.array([f(self, ffp, v) for v in kn])
 
-        self.neighborhood = self.kn.union(self.defended)
+        # Ordenar em ordem decrescente (ordenação estável, como em sorted)
+        kn_sorted = np.array(kn, dtype=np.int32)[
+            np.argsort(-scores, kind='stable')]
+
+        self._ranking = (k, f, kn_sorted)
+        return kn_sorted
 
     def filter_neighborhood(self, ffp, k: int, sigma: float, f: FunctionType):
         '''
@@ -88,24 +195,45 @@ class Solution(object):
                 sigma (float): fração dos melhores vizinhos a serem
                                retornados.
                 f     (FunctionType): critério guloso para rankear vizinhos.
+                               Se f possuir o atributo `batch`, todos os
+                               vizinhos são pontuados de uma só vez.
         '''
 
-        # Construir k-vizinhanças, se preciso
-        if self.kn is None:
-            self._construct_k_neighborhood(k, ffp.G)
-
-        # Ordenar k-vizinhanças em ordem descrescente usando função f
-        kn_sorted = sorted(list(self.kn),
-                           key=lambda v: f(self, ffp, v),
-                           reverse=True)
+        kn_sorted = self.ranked_neighborhood(ffp, k, f)
 
         # Retornar fração sigma dos melhores vizinhos unidos com defendidos
-        return set(kn_sorted[:ceil(sigma * len(kn_sorted))])\
+        return set(kn_sorted[:ceil(sigma * len(kn_sorted))].tolist())\
             .union(self.defended)
 
+    def summary(self):
+        '''
+        Resumo compacto da solução (vetores de bits e de inteiros), usado para
+        transferir soluções entre processos.
+        '''
+
+        return (self.defended_bits, self.burned_bits, self.its, self.T,
+                self.cost, self.neighborhood_bits)
+
+    @ staticmethod
+    def from_summary(summary: tuple):
+        ''' Função que reconstrói uma solução a partir de seu resumo.'''
+        defended, burned, its, T, cost, neighborhood = summary
+
+        sol = Solution.__new__(Solution)
+        sol.n = len(its)
+        sol.defended_bits, sol.burned_bits, sol.its = defended, burned, its
+        sol.T, sol.cost, sol.optimal, sol.gap = T, cost, True, None
+        sol.neighborhood_bits = neighborhood
+        sol._ranking = None
+        sol.kn_bits = None if neighborhood is None else \
+            neighborhood & ~defended
+
+        return sol
+
     def full_solution(self):
-        defended = [(x, self.iterations[x]) for x in self.defended]
-        burned = [(x, self.iterations[x]) for x in self.burned]
+        its = self.its.tolist()
+        defended = [(x, its[x]) for x in sorted(self.defended)]
+        burned = [(x, its[x]) for x in sorted(self.burned)]
         return defended, burned
 
     def __repr__(self):
@@ -118,27 +246,122 @@ class Solution(object):
     @ staticmethod
     def vars_to_solution(model: Model, G: Graph, T: int):
         ''' Função para traduzir variáveis do Gurobi para Solution.'''
-        b, d = model._b, model._d
-        defended, burned = set(), set()
-
         n = G.number_of_nodes()
-        iteration = [inf for _ in range(n)]
-
-        # Converter variáveis para conjuntos/listas
-        for v in range(n):
-            for t in range(T+1):
-
-                # Quando um nó é queimado ou defendido,
-                # guarda a iteração e vai para o próximo.
-                if b[v, t].X == 1.0:
-                    burned.add(v)
-                    iteration[v] = t
-                    break
-                elif d[v, t].X == 1.0:
-                    defended.add(v)
-                    iteration[v] = t
-                    break
-
-        optimal = model.status == GRB.Status.OPTIMAL
-        return Solution(defended, burned, iteration, T, int(model.objVal),
-                        optimal)
+
+        # Valores de todas as variáveis, obtidos de uma só vez, em matrizes
+        # n x (T+1): (v, t) indica se v está queimado/defendido no instante t
+        b = var_matrix(model, model._b, n)[:, :T+1] > 0.5
+        b[getattr(model, '_burned', [])] = True
+        d = var_matrix(model, model._d, n)[:, :T+1] > 0.5
+
+        # Primeiro instante em que cada vértice é queimado ou defendido (se
+        # ambos, conta como queimado)
+        touched = b | d
+        first = touched.argmax(axis=1)
+        touched = touched.any(axis=1)
+        is_burned = touched & b[np.arange(n), first]
+
+        defended = touched & ~is_burned
+        iteration = np.where(touched, first, -1)
+
+        # O objetivo é inteiro: se a busca foi interrompida porque o limitante
+        # superior não permite melhorar a solução, ela também é ótima.
+        optimal = model.status == GRB.Status.OPTIMAL or \
+            (model.status == GRB.Status.USER_OBJ_LIMIT and
+             model.ObjBound < model.objVal + 1)
+        # Gap infinito (ex.: interrompida por uma regra de parada) é omitido
+        gap = 0.0 if optimal else model.MIPGap
+        return Solution(defended, is_burned, iteration, T,
+                        int(round(model.objVal)), optimal,
+                        gap if isfinite(gap) else None)
+
+
+class UniqueSolutions(object):
+    '''
+    Conjunto de soluções únicas da fase construtiva. Duas soluções são iguais
+    se têm a mesma vizinhança completa (k-vizinhança unida com os defendidos),
+    e apenas a de maior custo é mantida para cada vizinhança. A chave é o
+    próprio vetor de bits da vizinhança (n/8 bytes): o dicionário compara pelo
+    hash dos bytes e, em caso de colisão, pelos bytes completos.
+    '''
+
+    def __init__(self, solutions=()):
+        self._best = {}
+        for sol in solutions:
+            self.add(sol)
+
+    def add(self, sol: Solution):
+        '''
+        Adiciona a solução `sol` (com vizinhança completa já construída) se
+        não houver outra com a mesma vizinhança ou se a existente tiver menor
+        custo. Retorna se a solução foi armazenada.
+        '''
+
+        key = sol.neighborhood_bits.tobytes()
+        curr = self._best.get(key)
+        if curr is not None and sol.cost <= curr.cost:
+            return False
+
+        self._best[key] = sol
+        return True
+
+    def __len__(self):
+        return len(self._best)
+
+    def __iter__(self):
+        return iter(self._best.values())
+
+
+def var_matrix(model: Model, x, n: int):
+    '''
+    Função que obtém, em uma única chamada ao Gurobi, os valores das variáveis
+    x[v, t] (0 <= v < n, 0 <= t <= model._T) de um modelo, como uma matriz
+    n x (model._T + 1). Pares (v, t) sem variável no modelo (formulação
+    esparsa) valem 0.
+    '''
+    X = np.zeros((n, model._T + 1))
+    if len(x) > 0:
+        v, t = np.array(list(x.keys())).T
+        X[v, t] = model.getAttr('X', list(x.values()))
+    return X
+
+
+def popcount(bits: np.ndarray):
+    ''' Número de bits 1 em um vetor de bits empacotado.'''
+    return int(_POPCOUNT[bits].sum())
+
+
+def neighborhood_distances(solutions: list, ref: Solution):
+    '''
+    Tamanho da diferença simétrica entre a vizinhança completa de cada solução
+    em `solutions` e a de `ref`, calculado de uma só vez sobre a matriz de
+    vetores de bits das vizinhanças.
+    '''
+    if len(solutions) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    bits = np.stack([s.neighborhood_bits for s in solutions])
+    return _POPCOUNT[bits ^ ref.neighborhood_bits].sum(axis=1, dtype=np.int64)
+
+
+def _pack(vertices, n: int):
+    '''
+    Empacota um conjunto de vértices (ou uma máscara booleana de tamanho n) em
+    um vetor de bits.
+    '''
+    if isinstance(vertices, np.ndarray) and vertices.dtype == bool:
+        return np.packbits(vertices)
+
+    mask = np.zeros(n, dtype=bool)
+    mask[np.fromiter(vertices, dtype=np.int64)] = True
+    return np.packbits(mask)
+
+
+def _unpack(bits: np.ndarray, n: int):
+    ''' Máscara booleana de tamanho n de um vetor de bits.'''
+    return np.unpackbits(bits, count=n).view(bool)
+
+
+def _unpack_set(bits: np.ndarray, n: int):
+    ''' Conjunto de vértices de um vetor de bits.'''
+    return set(np.flatnonzero(_unpack(bits, n)).tolist())
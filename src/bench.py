@@ -0,0 +1,189 @@
+'''
+Projeto Final: Mateurística para o Problema dos Brigadistas.
+
+bench.py: Benchmark dos métodos sobre um conjunto de instâncias, com
+comparação contra uma referência (baseline) gravada anteriormente.
+
+Disciplina:
+    MC859/MO824 - Pesquisa Operacional.
+Autores:
+    Eduardo Barros Innarelli - RA 170161
+    Victor Ferreira Ferrari  - RA 187890
+
+Universidade Estadual de Campinas - UNICAMP - 2020
+
+Modificado em: 18/10/2026
+'''
+
+import json
+import resource
+from argparse import ArgumentParser
+from multiprocessing import Pool
+from os.path import exists
+from statistics import median
+from sys import exit
+from time import perf_counter
+
+from FFP import FFP
+from io_util import generate_instance_list, run_key
+from main import GRASP, FFM, M_FFM, HYBRID, ROLLING
+from profiling import Profiler
+
+METHODS = {'grasp': GRASP, 'ffm': FFM, 'mffm': M_FFM, 'hybrid': HYBRID,
+           'rolling': ROLLING}
+
+
+def bench_run(job: tuple):
+    '''
+    Executa um método uma vez e mede tempo total, tempos por fase, pico de
+    memória e valor objetivo. Cada execução roda em um processo novo (ver
+    run_benchmark), então o pico de memória do processo é o da execução.
+    '''
+
+    method, filename, D, seed_number, matrix = job
+
+    ffp = FFP(D, matrix=matrix)
+    ffp.profiler = Profiler()
+
+    start = perf_counter()
+    ffp.read_input(filename)
+    best, _ = METHODS[method](ffp, seed_number)
+    wall = perf_counter() - start
+
+    # ru_maxrss é dado em KB no Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return {'cost': best.cost, 'time': wall, 'memory': peak,
+            'phases': ffp.profiler.report()['times']}
+
+
+def run_benchmark(methods: list, filenames: list, D_list: list,
+                  trials: int, seed_number: int, matrix: bool = False):
+    '''
+    Executa `trials` vezes cada combinação (método, instância, D), com as
+    sementes seed_number, seed_number+1, ..., e agrega as medidas: mediana
+    dos tempos, pior (menor) valor objetivo e maior pico de memória.
+
+        Returns:
+            Dicionário "método/conjunto/instância/D" -> medidas agregadas.
+    '''
+
+    jobs = [(method, f, D, seed_number + i, matrix)
+            for method in methods for f in filenames for D in D_list
+            for i in range(trials)]
+
+    results = {}
+    with Pool(1, maxtasksperchild=1) as pool:
+        for job, run in zip(jobs, pool.imap(bench_run, jobs)):
+            method, f, D, seed, _ = job
+            directory, instance, _, _ = run_key(f, D, seed)
+            key = f"{method}/{directory}/{instance}/{D}"
+            results.setdefault(key, []).append(run)
+            print(f"{key} (seed {seed}): cost {run['cost']}, "
+                  f"{run['time']:.3f}s, {run['memory']} KB")
+
+    return {key: aggregate(runs) for key, runs in results.items()}
+
+
+def aggregate(runs: list):
+    phases = {}
+    for run in runs:
+        for name, t in run['phases'].items():
+            phases.setdefault(name, []).append(t)
+
+    return {'cost': min(run['cost'] for run in runs),
+            'time': median(run['time'] for run in runs),
+            'memory': max(run['memory'] for run in runs),
+            'phases': {name: median(t) for name, t in phases.items()},
+            'trials': len(runs)}
+
+
+def compare(results: dict, baseline: dict, time_threshold: float,
+            quality_threshold: int, memory_threshold: float = None):
+    '''
+    Compara os resultados com a referência. Há regressão se o tempo mediano
+    cresceu mais que a fração `time_threshold`, se o pior valor objetivo caiu
+    mais que `quality_threshold` vértices salvos ou, se `memory_threshold` for
+    dado, se o pico de memória cresceu mais que essa fração.
+
+        Returns:
+            Lista de mensagens, uma por regressão encontrada.
+    '''
+
+    regressions = []
+    for key, res in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key}: not in baseline")
+            continue
+
+        print(f"{key}: time {base['time']:.3f}s -> {res['time']:.3f}s, "
+              f"cost {base['cost']} -> {res['cost']}, "
+              f"memory {base['memory']} -> {res['memory']} KB")
+
+        if res['time'] > base['time'] * (1 + time_threshold):
+            regressions.append(f"{key}: slowdown {base['time']:.3f}s -> "
+                               f"{res['time']:.3f}s")
+        if res['cost'] < base['cost'] - quality_threshold:
+            regressions.append(f"{key}: cost {base['cost']} -> "
+                               f"{res['cost']}")
+        if memory_threshold is not None and \
+                res['memory'] > base['memory'] * (1 + memory_threshold):
+            regressions.append(f"{key}: memory {base['memory']} -> "
+                               f"{res['memory']} KB")
+
+    return regressions
+
+
+if __name__ == '__main__':
+
+    # Argumentos da linha de comando
+    parser = ArgumentParser(add_help=True)
+    parser.add_argument('--methods', nargs='+', default=['grasp'],
+                        choices=list(METHODS))
+    parser.add_argument('--instance-list', type=str,
+                        default='instances/selected_instances.txt')
+    parser.add_argument('--D', nargs='+', type=int, default=[2])
+    parser.add_argument('--trials', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1337)
+    parser.add_argument('--max-n', type=int, required=False)
+    parser.add_argument('--matrix', action='store_true')
+    parser.add_argument('--baseline', type=str, required=False)
+    parser.add_argument('--save-baseline', type=str, required=False)
+    parser.add_argument('--time-threshold', type=float, default=0.1)
+    parser.add_argument('--quality-threshold', type=int, default=0)
+    parser.add_argument('--memory-threshold', type=float, required=False)
+    args = parser.parse_args()
+
+    if not exists(args.instance_list):
+        print("Instance list does not exist! Try again.")
+        exit(0)
+
+    # Instâncias do conjunto (opcionalmente, só as de até max_n vértices, cujo
+    # número é a segunda linha do arquivo)
+    filenames = generate_instance_list(args.instance_list)
+    if args.max_n is not None:
+        def size(f):
+            with open(f) as inst:
+                inst.readline()
+                return int(inst.readline())
+        filenames = [f for f in filenames if size(f) <= args.max_n]
+
+    results = run_benchmark(args.methods, filenames, args.D, args.trials,
+                            args.seed, args.matrix)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    # Comparar com a referência, terminando com erro se houver regressão
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = compare(results, baseline, args.time_threshold,
+                              args.quality_threshold, args.memory_threshold)
+        for msg in regressions:
+            print("REGRESSION", msg)
+        if regressions:
+            exit(1)
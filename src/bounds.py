@@ -0,0 +1,129 @@
+'''
+Projeto Final: Mateurística para o Problema dos Brigadistas.
+
+bounds.py: Limitantes superiores para o número de vértices salvos.
+
+Disciplina:
+    MC859/MO824 - Pesquisa Operacional.
+Autores:
+    Eduardo Barros Innarelli - RA 170161
+    Victor Ferreira Ferrari  - RA 187890
+
+Universidade Estadual de Campinas - UNICAMP - 2020
+
+Modificado em: 18/10/2026
+'''
+
+from math import floor, inf
+from time import time
+
+import numpy as np
+import gurobipy as gp
+from gurobipy import GRB
+
+from M_FFM import m_ffm
+
+# Variáveis do M-FFM construídas por segundo (estimativa conservadora). A
+# relaxação linear só é usada se a construção do modelo couber em metade do
+# limite de tempo do limitante.
+BUILD_RATE = 5000
+
+
+def layer_bound(ffp):
+    '''
+    Limitante pela primeira camada da BFS a partir de B: os vizinhos de B
+    (d(v, B) = 1) queimam na iteração 1, exceto os até D defendidos nela.
+    Assim, no máximo n - |B| - max(0, |L1| - D) vértices são salvos.
+    '''
+
+    to_B = ffp.dist.to_B
+    layer = int(np.count_nonzero(to_B == 1))
+
+    return len(to_B) - len(set(ffp.B)) - max(0, layer - ffp.D)
+
+
+def lp_bound(ffp, time_limit: float):
+    '''
+    Limitante pela relaxação linear do M-FFM (com o limite de iterações da
+    instância). Como o objetivo é inteiro, o valor da relaxação é arredondado
+    para baixo. O tempo de construção do modelo conta no limite de tempo, e
+    a relaxação nem é construída se o número estimado de variáveis indicar
+    que a construção gastaria mais que metade dele.
+
+        Returns:
+            O limitante, ou None se a relaxação não foi resolvida até o fim
+            (limite de tempo, modelo grande demais ou licença do Gurobi
+            limitada).
+    '''
+
+    if time_limit <= 0 or num_vars(ffp) > BUILD_RATE * time_limit / 2:
+        return None
+
+    start = time()
+    model = relaxed = None
+    try:
+        model = m_ffm(ffp.G, ffp.dist, ffp.B, ffp.D, ffp.max_T, time_limit,
+                      ffp.matrix)
+        model.update()
+        relaxed = model.relax()
+        model.dispose()
+        model = None
+
+        # Resolver no tempo que sobrou da construção
+        remaining = time_limit - (time() - start)
+        if remaining <= 0:
+            return None
+        relaxed.Params.TimeLimit = remaining
+
+        relaxed.optimize()
+        return floor(relaxed.ObjVal + 1e-6) \
+            if relaxed.Status == GRB.Status.OPTIMAL else None
+    except gp.GurobiError:
+        return None
+    finally:
+        for m in (model, relaxed):
+            if m is not None:
+                m.dispose()
+
+
+def num_vars(ffp):
+    '''
+    Número de variáveis do M-FFM esparso da instância, calculado pelas
+    distâncias a B, sem construir o modelo: b[v, t] para d(v, B) <= t <= T
+    e d[v, t] para 1 <= t <= T, para cada v fora de B com d(v, B) <= T.
+    '''
+
+    T = ffp.max_T
+    to_B = ffp.dist.to_B
+    R = to_B <= T
+    R[np.asarray(ffp.B, dtype=np.int64)] = False
+
+    return int((T - to_B[R] + 1).sum()) + int(np.count_nonzero(R)) * T
+
+
+def upper_bound(ffp, lp_time: float = 0):
+    '''
+    Melhor (menor) limitante superior disponível para a instância: o da
+    primeira camada e, se `lp_time` for positivo, o da relaxação linear,
+    resolvida com esse limite de tempo.
+
+        Returns:
+            O limitante e o nome do limitante que o atingiu.
+    '''
+
+    with ffp.profiler.timer('upper_bound'):
+        bounds = {'layer': layer_bound(ffp)}
+
+        lp = lp_bound(ffp, lp_time)
+        if lp is not None:
+            bounds['lp'] = lp
+
+    kind = min(bounds, key=bounds.get)
+    return bounds[kind], kind
+
+
+def relative_gap(bound: float, cost: float):
+    ''' Gap relativo entre o limitante e o custo, como no Gurobi.'''
+    if bound == cost:
+        return 0.0
+    return inf if cost == 0 else abs(bound - cost) / abs(cost)
@@ -0,0 +1,201 @@
+'''
+Projeto Final: Mateurística para o Problema dos Brigadistas.
+
+callbacks.py: Acompanhamento das resoluções dos modelos pelo Gurobi
+(eventos de incumbente e de limitante) e regras de parada antecipada.
+
+Disciplina:
+    MC859/MO824 - Pesquisa Operacional.
+Autores:
+    Eduardo Barros Innarelli - RA 170161
+    Victor Ferreira Ferrari  - RA 187890
+
+Universidade Estadual de Campinas - UNICAMP - 2020
+
+Modificado em: 18/10/2026
+'''
+
+import json
+from math import inf, isfinite
+from time import time
+
+from gurobipy import GRB, Model
+
+
+class SolveMonitor(object):
+    '''
+    Callback do Gurobi para os modelos FFM e M-FFM (de maximização). A cada
+    nova solução incumbente ou mudança do limitante superior, emite um evento
+    com o instante (segundos desde o início da resolução e horário), o valor
+    da incumbente, o limitante e o gap. Os eventos vão para um arquivo JSON
+    lines ou para uma função que recebe cada evento (dicionário).
+
+    As regras de parada são funções que recebem o monitor e retornam
+    verdadeiro para interromper a resolução (model.terminate()); ver
+    target_objective, gap_threshold e stall_time. Elas valem apenas para as
+    resoluções em que são pedidas (ver optimize): as buscas locais do GRASP
+    e as janelas do horizonte rolante são acompanhadas, mas não
+    interrompidas.
+    '''
+
+    def __init__(self, sink=None, rules: list = ()):
+        '''
+            Args:
+                sink  (str | callable): arquivo JSON lines (os eventos são
+                      acrescentados ao final) ou função chamada com cada
+                      evento. Se None, os eventos são descartados.
+                rules (list): regras de parada antecipada.
+        '''
+
+        self.sink = sink
+        self.rules = list(rules)
+
+        # Campos acrescentados a todos os eventos (ex.: instância e D)
+        self.context = {}
+
+        # O arquivo é aberto na primeira escrita, de modo que o monitor pode
+        # ser enviado a outros processos antes disso
+        self._file = None
+        self._reset({})
+
+    def _reset(self, fields: dict, stop: bool = True):
+        self.fields = fields
+        self.stop = stop
+        self.obj = -inf
+        self.bound = inf
+        self.runtime = 0.0
+        self.last_improvement = 0.0
+        self.stopped_by = None
+
+    @ property
+    def gap(self):
+        '''
+        Gap relativo entre o limitante e a incumbente, como no Gurobi (inf
+        sem solução ou com incumbente de valor zero).
+        '''
+        if self.obj == self.bound:
+            return 0.0
+        if self.obj == -inf or self.obj == 0:
+            return inf
+        return abs(self.bound - self.obj) / abs(self.obj)
+
+    def optimize(self, model: Model, stop: bool = True, **fields):
+        '''
+        Resolve o modelo com o monitor como callback. Os campos `fields`
+        (ex.: o nome da resolução) são acrescentados aos eventos dela. Se
+        `stop` for falso, as regras de parada são ignoradas.
+        '''
+
+        self._reset(fields, stop)
+        self.emit('start')
+        model.optimize(self)
+
+        found = model.SolCount > 0
+        self.emit('end', runtime=round(model.Runtime, 4), status=model.Status,
+                  obj=model.ObjVal if found else None,
+                  bound=_finite(model.ObjBound) if found else None,
+                  gap=_finite(model.MIPGap) if found else None,
+                  stopped_by=self.stopped_by)
+
+    def __call__(self, model: Model, where: int):
+        if where == GRB.Callback.MIPSOL:
+            obj = model.cbGet(GRB.Callback.MIPSOL_OBJ)
+            bound = model.cbGet(GRB.Callback.MIPSOL_OBJBND)
+        elif where == GRB.Callback.MIP:
+            obj = model.cbGet(GRB.Callback.MIP_OBJBST)
+            bound = model.cbGet(GRB.Callback.MIP_OBJBND)
+        else:
+            return
+
+        self.runtime = model.cbGet(GRB.Callback.RUNTIME)
+
+        # Sem incumbente (ou limitante), o Gurobi informa -GRB.INFINITY
+        # (ou GRB.INFINITY)
+        bound = inf if bound >= GRB.INFINITY else bound
+        if obj > self.obj and obj > -GRB.INFINITY:
+            self.obj = obj
+            self.last_improvement = self.runtime
+            self.bound = min(self.bound, bound)
+            self._emit_state('incumbent')
+        elif bound < self.bound:
+            self.bound = bound
+            self._emit_state('bound')
+
+        # Regras de parada antecipada
+        if self.stop and self.stopped_by is None:
+            for rule in self.rules:
+                if rule(self):
+                    self.stopped_by = rule.__name__
+                    self._emit_state('stop', rule=rule.__name__)
+                    model.terminate()
+                    break
+
+    def _emit_state(self, name: str, **fields):
+        obj = None if self.obj == -inf else self.obj
+        bound = None if self.bound == inf else self.bound
+        gap = None if self.gap == inf else round(self.gap, 6)
+        self.emit(name, runtime=round(self.runtime, 4), obj=obj,
+                  bound=bound, gap=gap, **fields)
+
+    def emit(self, name: str, **fields):
+        if self.sink is None:
+            return
+
+        event = {'event': name, 'timestamp': round(time(), 4),
+                 **self.context, **self.fields, **fields}
+        if callable(self.sink):
+            self.sink(event)
+            return
+
+        if self._file is None:
+            self._file = open(self.sink, 'a')
+        self._file.write(json.dumps(event) + '\n')
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_file'] = None
+        return state
+
+
+def _finite(value: float):
+    ''' O valor, ou None se infinito (JSON não representa infinito).'''
+    return value if isfinite(value) else None
+
+
+def optimize(model: Model, monitor: SolveMonitor = None, stop: bool = True,
+             **fields):
+    ''' Resolve o modelo, com o monitor como callback se houver um.'''
+    if monitor is None:
+        model.optimize()
+    else:
+        monitor.optimize(model, stop, **fields)
+
+
+def target_objective(target: float):
+    ''' Para quando a incumbente atinge o valor `target`.'''
+    def target_objective(monitor: SolveMonitor):
+        return monitor.obj >= target
+    return target_objective
+
+
+def gap_threshold(gap: float):
+    ''' Para quando o gap relativo fica menor ou igual a `gap`.'''
+    def gap_threshold(monitor: SolveMonitor):
+        return monitor.gap <= gap
+    return gap_threshold
+
+
+def stall_time(seconds: float):
+    '''
+    Para quando a incumbente não melhora há `seconds` segundos (contados a
+    partir do início da resolução, se ainda não houver incumbente).
+    '''
+    def stall_time(monitor: SolveMonitor):
+        return monitor.runtime - monitor.last_improvement >= seconds
+    return stall_time
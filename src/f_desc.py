@@ -12,34 +12,40 @@ Autores:
 
 Universidade Estadual de Campinas - UNICAMP - 2020
 
-Modificado em: 07/01/2021
+Modificado em: 18/10/2026
 '''
 
-from networkx import Graph
+import numpy as np
+
 from Solution import Solution
 
 from FFP import FFP
 
-def is_descendant(sp_len: dict, B: set, u: int, v: int):
-    '''
-    Função que checa se o vértice v é descendente de u no grafo não direcionado
-    G. Aqui, v é descendente de u se existe um caminho entre eles e se d(v, B)
-    > d(u, B), i.e., u está mais próximo do conjunto B.
 
-    NOTE: a entrada sempre é um grafo não-direcionado e conexo, então sempre há
-    um caminho entre u e v.
+def num_of_descendants(sol: Solution, ffp: FFP, u: int):
     '''
-
-    # Checar se u está mais próximo de B do que v
-    d_uB = min([sp_len[u][b] for b in B])
-    d_vB = min([sp_len[v][b] for b in B])
-
-    return d_uB < d_vB
+    Função que calcula e retorna o número de descendentes do vértice u. Aqui,
+    v é descendente de u se d(v, B) > d(u, B), i.e., u está mais próximo do
+    conjunto B de vértices queimados da solução (o grafo é conexo, então
+    sempre há um caminho entre u e v).
+    '''
+    d_B = ffp.dist.distance_to(sol.burned)
+    return int(np.count_nonzero(d_B > d_B[u]))
 
 
-def num_of_descendants(sol: Solution, ffp: FFP, u: int):
+def descendants_scores(sol: Solution, ffp: FFP, vertices: list):
     '''
-    Função que calcula e retorna o número de descendentes do vértice u.
+    Versão em lote de num_of_descendants: calcula o número de descendentes de
+    todos os vértices em `vertices` de uma só vez. A distância ao conjunto de
+    queimados é calculada uma vez (BFS de múltiplas fontes) e o número de
+    vértices mais distantes é obtido por busca binária no vetor ordenado.
     '''
-    return sum(is_descendant(ffp.sp_len, sol.burned, u, v)
-               for v in ffp.G.nodes)
+    d_B = ffp.dist.distance_to(sol.burned)
+    d_sorted = np.sort(d_B)
+    d_u = d_B[np.asarray(vertices, dtype=np.int64)]
+
+    return len(d_B) - np.searchsorted(d_sorted, d_u, side='right')
+
+
+# Critérios com versão em lote são usados assim por filter_neighborhood
+num_of_descendants.batch = descendants_scores
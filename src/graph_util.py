@@ -0,0 +1,178 @@
+'''
+Projeto Final: Mateurística para o Problema dos Brigadistas.
+
+graph_util.py: Estruturas compactas (CSR) e buscas em largura sobre o grafo
+de entrada.
+
+Disciplina:
+    MC859/MO824 - Pesquisa Operacional.
+Autores:
+    Eduardo Barros Innarelli - RA 170161
+    Victor Ferreira Ferrari  - RA 187890
+
+Universidade Estadual de Campinas - UNICAMP - 2020
+
+Modificado em: 18/10/2026
+'''
+
+from collections import OrderedDict
+
+import numpy as np
+from networkx import Graph
+
+
+def csr_adjacency(G: Graph):
+    '''
+    Função que constrói a lista de adjacência do grafo no formato CSR
+    (compressed sparse row). Os vizinhos de v são indices[indptr[v]:
+    indptr[v+1]].
+
+    NOTE: assume-se que os vértices são rotulados de 0 a n-1.
+
+        Args:
+            G (Graph): o grafo de entrada.
+        Returns:
+            Os vetores indptr (n+1) e indices (2m).
+    '''
+
+    n = G.number_of_nodes()
+    edges = np.array(G.edges, dtype=np.int64).reshape(-1, 2)
+
+    # Cada aresta aparece nos dois sentidos
+    src = np.concatenate((edges[:, 0], edges[:, 1]))
+    dst = np.concatenate((edges[:, 1], edges[:, 0]))
+    order = np.argsort(src, kind='stable')
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+
+    return indptr, dst[order]
+
+
+def neighbors_of(indptr: np.ndarray, indices: np.ndarray,
+                 vertices: np.ndarray):
+    '''
+    Função que retorna, de uma só vez, a concatenação das listas de vizinhos
+    dos vértices em `vertices` (com repetições).
+    '''
+
+    starts = indptr[vertices]
+    counts = indptr[vertices + 1] - starts
+    total = counts.sum()
+
+    # Posição de cada vizinho: início da lista do vértice + deslocamento
+    offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return indices[offsets + np.arange(total)]
+
+
+def multi_source_bfs(indptr: np.ndarray, indices: np.ndarray, sources):
+    '''
+    Busca em largura a partir de múltiplas fontes, feita por níveis. Retorna
+    a distância de cada vértice ao conjunto `sources`.
+
+    NOTE: vértices inalcançáveis recebem distância n, maior que qualquer
+    distância real e que qualquer limite de iterações usado nos modelos.
+    '''
+
+    n = len(indptr) - 1
+    dist = np.full(n, n, dtype=np.int32)
+
+    frontier = np.unique(np.fromiter(sources, dtype=np.int64))
+    dist[frontier] = 0
+
+    level = 0
+    while frontier.size > 0:
+        level += 1
+
+        # Próxima fronteira: vizinhos ainda não visitados
+        nbrs = neighbors_of(indptr, indices, frontier)
+        frontier = np.unique(nbrs[dist[nbrs] == n])
+        dist[frontier] = level
+
+    return dist
+
+
+class DistanceIndex(object):
+    '''
+    Índice de distâncias de cada vértice a um conjunto de vértices, usado no
+    lugar do caminho mínimo entre todos os pares. A distância ao conjunto
+    inicial B é calculada na construção (ou recebida pronta, em `to_B`); as
+    demais são calculadas sob demanda (uma BFS de múltiplas fontes por
+    conjunto) e guardadas em uma cache LRU.
+    '''
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, B: list,
+                 cache_size: int = 8, to_B: np.ndarray = None):
+        self.indptr = indptr
+        self.indices = indices
+        self.cache_size = cache_size
+
+        self._key_B = frozenset(B)
+        if to_B is None:
+            to_B = multi_source_bfs(indptr, indices, self._key_B)
+        self.to_B = to_B
+        self._cache = OrderedDict()
+
+    def distance_to(self, S):
+        ''' Vetor com a distância de cada vértice ao conjunto S.'''
+
+        key = S if isinstance(S, frozenset) else frozenset(S)
+        if key == self._key_B:
+            return self.to_B
+
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        dist = multi_source_bfs(self.indptr, self.indices, key)
+        self._cache[key] = dist
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        return dist
+
+
+class BallIndex(object):
+    '''
+    Índice das k-bolas do grafo: a k-bola de v é o conjunto dos vértices a no
+    máximo k arestas de v (incluindo v). Cada bola é calculada sob demanda,
+    por uma BFS limitada à profundidade k, e guardada como vetor de bits
+    empacotado (n/8 bytes), de modo que a vizinhança de um conjunto de
+    vértices é a união (ou bit a bit) de bolas já calculadas.
+    '''
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, k: int):
+        self.indptr = indptr
+        self.indices = indices
+        self.k = k
+        self.n = len(indptr) - 1
+        self._balls = {}
+
+    def ball(self, v: int):
+        ''' Vetor de bits da k-bola de v.'''
+
+        bits = self._balls.get(v)
+        if bits is None:
+            seen = np.zeros(self.n, dtype=bool)
+            seen[v] = True
+
+            frontier = np.array([v], dtype=np.int64)
+            for _ in range(self.k):
+                nbrs = neighbors_of(self.indptr, self.indices, frontier)
+                frontier = np.unique(nbrs[~seen[nbrs]])
+                if frontier.size == 0:
+                    break
+                seen[frontier] = True
+
+            bits = self._balls[v] = np.packbits(seen)
+
+        return bits
+
+    def union(self, vertices):
+        ''' Vetor de bits da união das k-bolas dos vértices em `vertices`.'''
+
+        bits = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        for v in vertices:
+            bits |= self.ball(v)
+
+        return bits
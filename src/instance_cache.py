@@ -0,0 +1,182 @@
+'''
+Projeto Final: Mateurística para o Problema dos Brigadistas.
+
+instance_cache.py: Cache das instâncias lidas (grafo, adjacência CSR e
+distâncias ao conjunto B), em memória e em disco.
+
+Disciplina:
+    MC859/MO824 - Pesquisa Operacional.
+Autores:
+    Eduardo Barros Innarelli - RA 170161
+    Victor Ferreira Ferrari  - RA 187890
+
+Universidade Estadual de Campinas - UNICAMP - 2020
+
+Modificado em: 18/10/2026
+'''
+
+import os
+from collections import OrderedDict
+from os.path import basename, dirname, join, realpath
+
+import numpy as np
+from networkx import Graph
+
+from graph_util import csr_adjacency, DistanceIndex
+
+# Diretório da cache em disco, criado ao lado de cada instância
+CACHE_DIR = '__ffpcache__'
+
+# Versão do formato em disco (arquivos de outra versão são ignorados)
+_FORMAT = 1
+
+# Cache em memória: (caminho, mtime) -> Instance, com política LRU
+_memory = OrderedDict()
+MEMORY_SIZE = 16
+
+
+class Instance(object):
+    '''
+    Dados de uma instância que não dependem de D: grafo, vértices
+    inicialmente queimados, adjacência CSR, índice de distâncias e índices de
+    k-bolas (por k, preenchidos sob demanda). Os objetos são compartilhados
+    entre execuções e não devem ser modificados.
+    '''
+
+    def __init__(self, G: Graph, B: list, indptr: np.ndarray,
+                 indices: np.ndarray, dist: DistanceIndex):
+        self.G = G
+        self.B = B
+        self.indptr = indptr
+        self.indices = indices
+        self.dist = dist
+        self.balls = {}
+
+
+def load_instance(filename: str, disk: bool = True):
+    '''
+    Função que carrega uma instância, lendo o arquivo texto apenas se ela não
+    estiver na cache. A cache é indexada pelo caminho e pela data de
+    modificação do arquivo, de modo que editar a instância invalida as
+    entradas antigas.
+
+        Args:
+            filename (str): arquivo da instância.
+            disk (bool): se verdadeiro, usa também a cache em disco, em
+                         __ffpcache__/<instância>.npz.
+    '''
+
+    path = realpath(filename)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns)
+
+    if key in _memory:
+        _memory.move_to_end(key)
+        return _memory[key]
+
+    stamp = np.array([_FORMAT, stat.st_mtime_ns, stat.st_size],
+                     dtype=np.int64)
+    cache_file = join(dirname(path), CACHE_DIR, basename(path) + '.npz')
+
+    inst = _read_cache(cache_file, stamp) if disk else None
+    if inst is None:
+        nodes, edges, B = parse_instance(path)
+        inst = _build(nodes, edges, B)
+        if disk:
+            _write_cache(cache_file, stamp, nodes, edges, inst)
+
+    _memory[key] = inst
+    if len(_memory) > MEMORY_SIZE:
+        _memory.popitem(last=False)
+
+    return inst
+
+
+def parse_instance(filename: str):
+    '''
+    Função que lê o arquivo texto de uma instância.
+
+        Returns:
+            Os vértices (na ordem em que aparecem), as arestas (na ordem do
+            arquivo) e os vértices inicialmente queimados.
+    '''
+
+    nodes, edges, B = {}, [], []
+    with open(filename, 'r') as f:
+
+        # Iterar sobre as linhas do arquivo
+        for (idx, line) in enumerate(f):
+            values = line.split()
+
+            # Adicionar vértices de B
+            if idx > 4 and len(values) == 1:
+                B.append(int(values[0]))
+
+            # Adicionar arestas
+            elif len(values) == 2:
+                u, v = int(values[0]), int(values[1])
+                nodes.setdefault(u)
+                nodes.setdefault(v)
+                edges.append((u, v))
+
+    return list(nodes), edges, B
+
+
+def _build(nodes, edges, B: list, indptr: np.ndarray = None,
+           indices: np.ndarray = None, to_B: np.ndarray = None):
+    '''
+    Monta a instância. O grafo é construído inserindo os vértices e as
+    arestas na ordem do arquivo, o que reproduz a ordem de iteração de um
+    grafo lido aresta por aresta.
+    '''
+
+    G = Graph()
+    G.add_nodes_from(nodes)
+    G.add_edges_from(edges)
+
+    if indptr is None:
+        indptr, indices = csr_adjacency(G)
+    dist = DistanceIndex(indptr, indices, B, to_B=to_B)
+
+    return Instance(G, B, indptr, indices, dist)
+
+
+def _read_cache(cache_file: str, stamp: np.ndarray):
+    ''' Lê a instância da cache em disco, se existir e estiver atualizada.'''
+
+    try:
+        with np.load(cache_file) as data:
+            if not np.array_equal(data['stamp'], stamp):
+                return None
+
+            return _build(data['nodes'].tolist(),
+                          [tuple(e) for e in data['edges'].tolist()],
+                          data['B'].tolist(), data['indptr'],
+                          data['indices'], data['to_B'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _write_cache(cache_file: str, stamp: np.ndarray, nodes, edges,
+                 inst: Instance):
+    '''
+    Grava a instância na cache em disco. A escrita é feita em um arquivo
+    temporário renomeado ao final, para que execuções simultâneas nunca leiam
+    um arquivo incompleto. Falhas de escrita (ex.: diretório sem permissão)
+    apenas desabilitam a cache em disco para a instância.
+    '''
+
+    tmp = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(dirname(cache_file), exist_ok=True)
+        with open(tmp, 'wb') as f:
+            np.savez(f, stamp=stamp,
+                     nodes=np.array(nodes, dtype=np.int64),
+                     edges=np.array(edges, dtype=np.int64).reshape(-1, 2),
+                     B=np.array(inst.B, dtype=np.int64),
+                     indptr=inst.indptr, indices=inst.indices,
+                     to_B=inst.dist.to_B)
+        os.replace(tmp, cache_file)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
@@ -11,14 +11,20 @@ Autores:
 
 Universidade Estadual de Campinas - UNICAMP - 2020
 
-Modificado em: 09/01/2021
+Modificado em: 18/10/2026
 '''
 
 from Solution import Solution
 from FFP import FFP
 
-from os.path import split, join, basename, splitext
+from os.path import (split, join, basename, splitext, exists,
+                     getsize)
 import csv
+import json
+
+# Colunas dos arquivos CSV de resultados
+FIELDNAMES = ['set', 'n', 'result', 'instance', 'D', 'runtime', 'seed',
+              'gap']
 
 def generate_instance_list(filename: str):
     f = open(filename)
@@ -38,30 +44,97 @@ def print_result(filename : str, n : int, best : Solution, D : int,
     path, filename = split(filename)
     directory = split(path)[1]
 
+    gap = '' if best.gap is None else f"{best.gap:.4f}"
     print(f"\"{directory}\",{n},{best.cost},"
-          f"\"{filename}\",{D},{final_time:.4f}")
+          f"\"{filename}\",{D},{final_time:.4f},{gap}")
 
 def result_to_dict(filename : str, n : int, best : Solution, D : int, 
-                   final_time : float):
+                   final_time : float, seed_number : int = None):
     path, filename = split(filename)
     directory = split(path)[1]
     
     res = {'set':directory, 'n':n, 'result':best.cost, 
-           'instance':filename, 'D':D, 'runtime':round(final_time, 4)}
+           'instance':filename, 'D':D, 'runtime':round(final_time, 4),
+           'seed':seed_number,
+           'gap':None if best.gap is None else round(best.gap, 4)}
     
     return res
 
-def dicts_to_csv(dicts : list, prefix : str, csv_filename : str):
+def run_key(filename : str, D : int, seed_number : int):
+    '''
+    Chave (set, instance, D, seed) de uma execução, usada para identificar
+    execuções já gravadas no CSV de um método.
+    '''
+    path, filename = split(filename)
+    directory = split(path)[1]
+    
+    return (directory, filename, int(D), int(seed_number))
+
+def open_csv(prefix : str, csv_filename : str, resume : bool = False):
+    '''
+    Abre o arquivo CSV de resultados de um método, para gravar os resultados
+    um a um. Com `resume`, um arquivo existente é mantido e os novos
+    resultados são acrescentados ao final; caso contrário, o arquivo é
+    recriado com o cabeçalho.
+
+        Returns:
+            O arquivo, o escritor e o conjunto de chaves (ver run_key) das
+            execuções já gravadas.
+    '''
     final_csv_name = join('results', 'project', prefix+'-'+csv_filename)
-    csvfile = open(final_csv_name, 'w', newline='')
-    fieldnames = ['set', 'n', 'result', 'instance', 'D', 'runtime']
-    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-    writer.writeheader()
+    done = set()
     
-    for d in dicts:
-        writer.writerow(d)
+    # Descartar uma última linha incompleta (execução interrompida durante a
+    # escrita)
+    if resume and exists(final_csv_name):
+        with open(final_csv_name, 'rb+') as f:
+            content = f.read()
+            if not content.endswith(b'\n'):
+                f.truncate(content.rfind(b'\n') + 1)
+    
+    if resume and exists(final_csv_name) and getsize(final_csv_name) > 0:
+        with open(final_csv_name, 'r', newline='') as csvfile:
+            reader = csv.DictReader(csvfile)
+            if reader.fieldnames != FIELDNAMES:
+                raise ValueError(f"Cannot resume {final_csv_name}: "
+                                 f"expected columns {FIELDNAMES}")
+            
+            for row in reader:
+                done.add((row['set'], row['instance'], int(row['D']),
+                          int(row['seed'])))
         
-    csvfile.close()
+        csvfile = open(final_csv_name, 'a', newline='')
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
+    else:
+        csvfile = open(final_csv_name, 'w', newline='')
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        csvfile.flush()
+    
+    return csvfile, writer, done
+
+def open_trace(prefix : str, csv_filename : str, resume : bool = False):
+    '''
+    Abre o arquivo de rastro (JSON lines) de um método, ao lado do CSV de
+    resultados: uma linha por execução, com os tempos, contadores e eventos
+    coletados pelo Profiler. Com `resume`, novas linhas são acrescentadas.
+    '''
+    stem = splitext(csv_filename)[0]
+    final_trace_name = join('results', 'project',
+                            prefix+'-'+stem+'.trace.jsonl')
+    
+    return open(final_trace_name, 'a' if resume else 'w')
+
+def trace_record(filename : str, D : int, seed_number : int, report : dict):
+    path, filename = split(filename)
+    directory = split(path)[1]
+    
+    return {'set':directory, 'instance':filename, 'D':D, 'seed':seed_number,
+            **report}
+
+def write_trace(trace, record : dict):
+    trace.write(json.dumps(record) + '\n')
+    trace.flush()
 
 def result_to_visualizer(filename : str, ffp : FFP, sol : Solution):
     res_file = splitext(basename(filename))[0]
@@ -11,28 +11,41 @@ Autores:
 
 Universidade Estadual de Campinas - UNICAMP - 2020
 
-Modificado em: 09/01/2021
+Modificado em: 18/10/2026
 '''
 
-from argparse import ArgumentParser
+from argparse import ArgumentParser, ArgumentTypeError
+import json
+from math import isfinite
+from multiprocessing import Pool, cpu_count
 from os.path import exists
 from random import seed
 from time import time
 from sys import exit
 
 from FFP import FFP
-from Solution import Solution
+from callbacks import (SolveMonitor, optimize, target_objective,
+                       gap_threshold, stall_time)
+from Solution import Solution, UniqueSolutions
+from bounds import upper_bound, relative_gap
 from f_desc import num_of_descendants
-from io_util import (generate_instance_list, print_result, dicts_to_csv,
-                     result_to_dict, result_to_visualizer)
+from instance_cache import load_instance
+from io_util import (generate_instance_list, print_result, open_csv,
+                     result_to_dict, result_to_visualizer, run_key,
+                     open_trace, trace_record, write_trace)
+from profiling import Profiler
 
 from NatGRASP import NatGRASP
+from rolling_horizon import rolling_horizon
 from FFM import ffm
 from M_FFM import m_ffm
 
+import gurobipy as gp
+
 
 def main():
-    methods = {'grasp': GRASP, 'ffm': FFM, 'mffm': M_FFM}
+    methods = {'grasp': GRASP, 'ffm': FFM, 'mffm': M_FFM, 'hybrid': HYBRID,
+               'rolling': ROLLING}
 
     # Ler argumentos da linha de comando
     parser = ArgumentParser(add_help=True)
@@ -41,6 +54,21 @@ def main():
     parser.add_argument('--out-file', required=False)
     parser.add_argument('--D', nargs='+', type=int,
                         required=False, default=[2])
+    parser.add_argument('--workers', type=int, required=False, default=1)
+    parser.add_argument('--jobs', type=int, required=False, default=1)
+    parser.add_argument('--matrix', action='store_true')
+    parser.add_argument('--reduce', action='store_true')
+    parser.add_argument('--seed', type=int, required=False, default=1337)
+    parser.add_argument('--resume', action='store_true')
+    parser.add_argument('--profile', action='store_true')
+    parser.add_argument('--events', type=str, required=False)
+    parser.add_argument('--target', type=float, required=False)
+    parser.add_argument('--gap', type=float, required=False)
+    parser.add_argument('--stall', type=float, required=False)
+    parser.add_argument('--window', type=positive_int, required=False,
+                        default=10)
+    parser.add_argument('--step', type=positive_int, required=False,
+                        default=5)
                         
     exclusive = parser.add_mutually_exclusive_group(required=False)
     exclusive.add_argument('--instance-list', action='store_true')
@@ -53,6 +81,9 @@ def main():
         print("File does not exist! Try again.")
         exit(0)
 
+    # Tamanho da janela e do avanço do horizonte rolante
+    methods['rolling'] = Rolling(args.window, args.step)
+
     # Lista de métodos
     if args.method == 'all':
         mets = methods.values()
@@ -60,7 +91,7 @@ def main():
         mets = [FFM, M_FFM]
     elif args.method.lower() not in methods.keys():
         print("Method does not exist! Available: 'grasp', 'ffm, 'mffm',"
-              " 'ilp','all'")
+              " 'hybrid', 'rolling', 'ilp','all'")
         exit(0)
     else:
         mets = [methods[args.method]]
@@ -71,56 +102,107 @@ def main():
     else:
         filenames = [args.input_file]
 
+    # Monitor das resoluções: eventos de incumbente/limitante e regras de
+    # parada antecipada
+    rules = []
+    if args.target is not None:
+        rules.append(target_objective(args.target))
+    if args.gap is not None:
+        rules.append(gap_threshold(args.gap))
+    if args.stall is not None:
+        rules.append(stall_time(args.stall))
+    monitor = SolveMonitor(args.events, rules) \
+        if args.events or rules else None
+
     # Executar para CSV se nome do arquivo de saida for passado.
     # Senão, executar com saída para stdout.
     if args.visualizer:
-        run_to_visualizer(filenames, args.D, mets)
+        run_to_visualizer(filenames, args.D, mets, args.workers, args.matrix,
+                          args.seed, monitor, args.reduce)
+    elif args.jobs > 1:
+        run_batch(filenames, args.D, mets, args.out_file, args.jobs,
+                  args.matrix, args.seed, args.resume, args.profile, monitor,
+                  args.reduce)
     elif args.out_file:
-        run_to_csv(filenames, args.D, mets, args.out_file)
+        run_to_csv(filenames, args.D, mets, args.out_file, args.workers,
+                   args.matrix, args.seed, args.resume, args.profile,
+                   monitor, args.reduce)
     else:
-        run_and_print(filenames, args.D, mets)
+        run_and_print(filenames, args.D, mets, args.workers, args.matrix,
+                      args.seed, args.profile, monitor, args.reduce)
 
+    if monitor:
+        monitor.close()
 
-def run_to_csv(filenames : list, D_list : list, methods : list, 
-               out_file : str):
 
-    # Instanciar problema
-    seed_number = 1337
+def positive_int(value : str):
+    ''' Tipo de argumento: inteiro maior ou igual a 1.'''
+    number = int(value)
+    if number < 1:
+        raise ArgumentTypeError(f"{value} is not a positive integer")
+    return number
+
+
+def run_to_csv(filenames : list, D_list : list, methods : list, 
+               out_file : str, workers : int = 1, matrix : bool = False,
+               seed_number : int = 1337, resume : bool = False,
+               profile : bool = False, monitor : SolveMonitor = None,
+               reduce : bool = False):
 
     # Executar cada método.
     for run in methods:
-        ffp = FFP(5)
-        results = []
+        ffp = FFP(5, matrix=matrix, reduce=reduce)
+        ffp.profiler = Profiler(enabled=profile)
+        ffp.monitor = monitor
         prefix = run.__name__
         inst = 0
 
+        # Cada resultado é gravado assim que a execução termina; com
+        # `resume`, execuções já gravadas são puladas.
+        csvfile, writer, done = open_csv(prefix, out_file, resume)
+        trace = open_trace(prefix, out_file, resume) if profile else None
+
         # Executar para cada arquivo.
         for f in filenames:
             inst += 1
             d_index = 0
             for D in D_list:
                 d_index += 1
+                if run_key(f, D, seed_number) in done:
+                    continue
+
                 print(f"Method {prefix}: {inst}/{len(filenames)}, "
                       f"{d_index}/{len(D_list)} runs", end='\r')
                 ffp.D = D
                 ffp.read_input(f)
-                best, final_time = run(ffp, seed_number)
+                ffp.profiler.reset()
+                set_context(monitor, prefix, f, D, seed_number)
+                best, final_time = run_method(run, ffp, seed_number, workers)
 
                 # Filtrar resultado
-                results.append(result_to_dict(f, ffp.G.number_of_nodes(),
-                                              best, D, final_time))
-        dicts_to_csv(results, prefix, out_file)
+                writer.writerow(result_to_dict(f, ffp.G.number_of_nodes(),
+                                               best, D, final_time,
+                                               seed_number))
+                csvfile.flush()
+                if trace:
+                    write_trace(trace, trace_record(f, D, seed_number,
+                                                    ffp.profiler.report()))
+        csvfile.close()
+        if trace:
+            trace.close()
         print()
 
 
-def run_and_print(filenames : list, D_list : list, methods : list):
-
-    # Instanciar problema
-    seed_number = 1337
+def run_and_print(filenames : list, D_list : list, methods : list,
+                  workers : int = 1, matrix : bool = False,
+                  seed_number : int = 1337, profile : bool = False,
+                  monitor : SolveMonitor = None, reduce : bool = False):
 
     # Executar cada método.
     for run in methods:
-        ffp = FFP(5)
+        ffp = FFP(5, matrix=matrix, reduce=reduce)
+        ffp.profiler = Profiler(enabled=profile)
+        ffp.monitor = monitor
         print(f"Method: {run.__name__}. Instances: {len(filenames)}. "
               f"Runs: {len(D_list)}.")
 
@@ -129,84 +211,293 @@ def run_and_print(filenames : list, D_list : list, methods : list):
             for D in D_list:
                 ffp.D = D
                 ffp.read_input(f)
+                ffp.profiler.reset()
+                set_context(monitor, run.__name__, f, D, seed_number)
 
-                best, final_time = run(ffp, seed_number)
+                best, final_time = run_method(run, ffp, seed_number, workers)
 
-                # Imprimir resultado
+                # Imprimir resultado (e o rastro, se coletado)
                 print_result(f, ffp.G.number_of_nodes(),
                              best, D, final_time)
+                if profile:
+                    print(json.dumps(trace_record(f, D, seed_number,
+                                                  ffp.profiler.report())))
+
+def run_batch(filenames : list, D_list : list, methods : list,
+              out_file : str = None, jobs : int = 2, matrix : bool = False,
+              seed_number : int = 1337, resume : bool = False,
+              profile : bool = False, monitor : SolveMonitor = None,
+              reduce : bool = False):
+    '''
+    Executa todas as combinações (método, instância, D) em um conjunto de
+    `jobs` processos. Os processadores são divididos entre as execuções
+    simultâneas pelo parâmetro Threads do Gurobi, e as execuções mais longas
+    (limite de tempo proporcional ao número de vértices) começam primeiro.
+    Cada resultado é gravado (ou impresso) assim que sua execução termina,
+    portanto fora da ordem das instâncias; com `resume`, execuções já
+    gravadas são puladas.
+
+    NOTE: a fase construtiva do GRASP é sequencial em cada execução, pois os
+    processos do conjunto não podem criar outros processos.
+    '''
+
+    # Arquivos de saída (e de rastro), um por método
+    outputs, traces = {}, {}
+    if out_file:
+        outputs = {run.__name__: open_csv(run.__name__, out_file, resume)
+                   for run in methods}
+    if out_file and profile:
+        traces = {run.__name__: open_trace(run.__name__, out_file, resume)
+                  for run in methods}
+
+    # Execuções ainda não gravadas
+    tasks = [(run, f, D, seed_number)
+             for run in methods for f in filenames for D in D_list
+             if not (out_file and
+                     run_key(f, D, seed_number) in outputs[run.__name__][2])]
+
+    # Tamanho de cada instância (a leitura também preenche a cache em disco,
+    # reaproveitada pelos processos)
+    sizes = {f: load_instance(f).G.number_of_nodes()
+             for f in set(task[1] for task in tasks)}
+
+    # Execuções, das mais longas para as mais curtas
+    tasks.sort(key=lambda task: sizes[task[1]], reverse=True)
+
+    threads = max(1, cpu_count() // jobs)
+    with Pool(jobs, _init_batch_worker,
+              (threads, matrix, profile, monitor, reduce)) as pool:
+        done = 0
+        for prefix, f, n, best, D, final_time, report in \
+                pool.imap_unordered(_batch_worker, tasks):
+            done += 1
+            record = trace_record(f, D, seed_number, report)
+            if out_file:
+                print(f"Runs: {done}/{len(tasks)}", end='\r')
+                csvfile, writer, _ = outputs[prefix]
+                writer.writerow(result_to_dict(f, n, best, D, final_time,
+                                               seed_number))
+                csvfile.flush()
+                if profile:
+                    write_trace(traces[prefix], record)
+            else:
+                print_result(f, n, best, D, final_time)
+                if profile:
+                    print(json.dumps(record))
+
+    for csvfile, _, _ in outputs.values():
+        csvfile.close()
+    for trace in traces.values():
+        trace.close()
+    if out_file:
+        print()
+
+
+# Problema de cada processo do modo em lote
+_batch_ffp = None
 
-def run_to_visualizer(filenames : list, D : list, method : list):
-    
-    # Instanciar problema
-    seed_number = 1337
+
+def _init_batch_worker(threads : int, matrix : bool, profile : bool,
+                       monitor : SolveMonitor = None, reduce : bool = False):
+    global _batch_ffp
+    gp.setParam('Threads', threads)
+    _batch_ffp = FFP(5, matrix=matrix, reduce=reduce)
+    _batch_ffp.profiler = Profiler(enabled=profile)
+    _batch_ffp.monitor = monitor
+
+
+def _batch_worker(task : tuple):
+    run, f, D, seed_number = task
+    ffp = _batch_ffp
+    ffp.D = D
+    ffp.read_input(f)
+    ffp.profiler.reset()
+    set_context(ffp.monitor, run.__name__, f, D, seed_number)
+
+    best, final_time = run_method(run, ffp, seed_number)
+    return (run.__name__, f, ffp.G.number_of_nodes(), best, D, final_time,
+            ffp.profiler.report())
+
+
+def run_to_visualizer(filenames : list, D : list, method : list,
+                      workers : int = 1, matrix : bool = False,
+                      seed_number : int = 1337,
+                      monitor : SolveMonitor = None, reduce : bool = False):
 
     # Executar.
-    ffp = FFP(D[0])
+    ffp = FFP(D[0], matrix=matrix, reduce=reduce)
+    ffp.monitor = monitor
     ffp.read_input(filenames[0])
+    set_context(monitor, method[0].__name__, filenames[0], D[0], seed_number)
 
-    best, _ = method[0](ffp, seed_number)
+    best, _ = run_method(method[0], ffp, seed_number, workers)
 
     # Imprimir resultado
     result_to_visualizer(filenames[0], ffp, best)
 
-def GRASP(ffp : FFP, seed_number : int):
+def run_method(run, ffp : FFP, seed_number : int, workers : int = 1):
+    '''
+    Executa o método `run` sobre a instância, ou sobre a instância reduzida
+    se ffp.reduce, traduzindo a solução para os vértices originais. O tempo
+    inclui o da redução.
+    '''
+
+    if not ffp.reduce:
+        return run(ffp, seed_number, workers)
+
+    start_time = time()
+    reduction = ffp.reduction()
+    reduce_time = time() - start_time
+
+    best, final_time = run(reduction.ffp, seed_number, workers)
+    return reduction.lift(best), final_time + reduce_time
+
+
+def set_context(monitor : SolveMonitor, method : str, filename : str,
+                D : int, seed_number : int):
+    ''' Identifica a execução atual nos eventos do monitor, se houver.'''
+    if monitor:
+        monitor.context = trace_record(filename, D, seed_number,
+                                       {'method': method})
+
+
+def GRASP(ffp : FFP, seed_number : int, workers : int = 1,
+          limit : float = None, lp : bool = True):
 
     # Parâmetros
     k = 2
     f = num_of_descendants
     eps = 0.5
-    limit = ffp.G.number_of_nodes() / 2
+    if limit is None:
+        limit = ffp.time_limit()
     alpha = 0.3
     eta = 11000
     rho = 4
+    lp_share = 0.1 if lp else 0
 
-    # Instanciar mateurística
+    # Limitante superior (primeira camada e, se `lp`, relaxação linear do
+    # M-FFM): uma solução que o atinge é ótima e encerra a execução
     seed(seed_number)
     start_time = time()
-    method = NatGRASP(ffp, k, f, eps, limit, start_time)
+    bound, kind = upper_bound(ffp, lp_share * limit)
 
-    # PASSO 1: Construção
-    S = set()
+    # Instanciar mateurística
+    method = NatGRASP(ffp, k, f, eps, limit, start_time, bound)
 
-    # Critério de parada 1: eta iterações
-    for _ in range(eta):
+    # PASSO 1: Construção (critérios de parada: eta iterações ou metade do
+    # limite de tempo alcançado), armazenando apenas a melhor solução de cada
+    # vizinhança
+    with ffp.profiler.timer('construction'):
+        S = UniqueSolutions(method.construction(alpha, eta, workers,
+                                                seed_number))
+    ffp.profiler.count('unique_solutions', len(S))
 
-        # Critério de parada 2: metade do limite de tempo alcançado
-        if time() - method.start_time >= method.limit / 2:
-            break
+    # PASSO 2: Seleção
+    with ffp.profiler.timer('pool_selection'):
+        P, best = method.pool_selection(S, rho)
+
+    # PASSO 3: Busca Local (o tempo inclui o da intensificação)
+    with ffp.profiler.timer('adaptive_local_search'):
+        best = method.adaptive_local_search(ffp, P, best,
+                                            time()-start_time)
+
+    # Qualidade da solução em relação ao limitante (sem gap se infinito,
+    # isto é, com custo zero)
+    gap = relative_gap(bound, best.cost)
+    best.gap = gap if isfinite(gap) else None
+    best.optimal = best.cost >= bound
+    ffp.profiler.event('upper_bound', kind=kind, bound=bound, cost=best.cost,
+                       gap=None if best.gap is None else round(best.gap, 4))
 
-        curr = method.constructive_heuristic_th(alpha)
-        S.add(curr)
+    return best, time()-start_time
 
-    # PASSO 2: Seleção
-    P, best = method.pool_selection(S, rho)
 
-    # PASSO 3: Busca Local
-    best = method.adaptive_local_search(ffp, P, best, time()-start_time)
+def HYBRID(ffp : FFP, seed_number : int, workers : int = 1):
+    '''
+    GRASP curto seguido do M-FFM: a melhor solução do GRASP é o ponto de
+    partida (MIP start) e o corte do modelo exato, que usa o restante do
+    limite de tempo. A solução retornada traz o gap final do Gurobi.
+
+    O GRASP não calcula a relaxação linear (o modelo exato já fornece o
+    limitante), e o modelo das buscas locais é liberado antes da construção
+    do modelo exato, para que os dois não fiquem em memória ao mesmo tempo.
+    '''
+
+    # Parâmetros: fração do limite de tempo dada ao GRASP
+    limit = ffp.time_limit()
+    share = 0.25
+
+    start_time = time()
+    with ffp.profiler.timer('grasp'):
+        start, _ = GRASP(ffp, seed_number, workers, share * limit, lp=False)
+
+    # Solução do GRASP já provada ótima pelo limitante
+    if start.optimal:
+        return start, time()-start_time
+
+    ffp.dispose_local_search_model()
+    with ffp.profiler.timer('model_build'):
+        m = m_ffm(ffp.G, ffp.dist, ffp.B, ffp.D, ffp.max_T,
+                  max(0, limit - (time() - start_time)), ffp.matrix)
+        m.update()
+    best, _ = solve_exact(ffp, m, start)
 
     return best, time()-start_time
 
 
-def FFM(ffp : FFP, *_):
-    m = ffm(ffp.G, ffp.B, ffp.D, ffp.max_T, ffp.G.number_of_nodes() / 2)
-    m.optimize()
+class Rolling(object):
+    '''
+    Horizonte rolante sobre o M-FFM (ver rolling_horizon.py), com janelas de
+    `window` iterações avançando `step` iterações por vez. É uma classe (e
+    não uma função parcial) para que o método, com seus parâmetros e nome,
+    possa ser enviado aos processos de run_batch.
+    '''
 
-    if m.SolCount > 0:
-        sol = Solution.vars_to_solution(m, ffp.G, ffp.max_T)
-    else:
-        sol = Solution(set(), set(), [], ffp.max_T)
+    __name__ = 'ROLLING'
 
-    return sol, m.Runtime
+    def __init__(self, window : int = 10, step : int = 5):
+        self.window = window
+        self.step = step
+
+    def __call__(self, ffp : FFP, *_):
+        return rolling_horizon(ffp, self.window, self.step, ffp.time_limit())
+
+
+ROLLING = Rolling()
+
+
+def FFM(ffp : FFP, *_, start : Solution = None):
+    with ffp.profiler.timer('model_build'):
+        m = ffm(ffp.G, ffp.B, ffp.D, ffp.max_T, ffp.time_limit(),
+                ffp.matrix)
+        m.update()
+    return solve_exact(ffp, m, start)
+
+
+def M_FFM(ffp : FFP, *_, start : Solution = None):
+    with ffp.profiler.timer('model_build'):
+        m = m_ffm(ffp.G, ffp.dist, ffp.B, ffp.D,
+                  ffp.max_T, ffp.time_limit(), ffp.matrix)
+        m.update()
+    return solve_exact(ffp, m, start)
+
+
+def solve_exact(ffp : FFP, m, start : Solution = None):
 
+    # Partir de uma solução conhecida, se houver, descartando soluções piores
+    # que ela (corte) e parando se o limitante provar que ela é ótima
+    if start is not None:
+        start_cost = ffp.set_mip_start(m, start)
+        m.Params.Cutoff = start_cost - 0.5
+        m.Params.BestBdStop = start_cost + 0.5
 
-def M_FFM(ffp : FFP, *_):
-    m = m_ffm(ffp.G, ffp.sp_len, ffp.B, ffp.D,
-              ffp.max_T, ffp.G.number_of_nodes() / 2)
-    m.optimize()
+    optimize(m, ffp.monitor, solve='exact')
+    ffp.profiler.solve_event('exact', m)
 
     if m.SolCount > 0:
         sol = Solution.vars_to_solution(m, ffp.G, ffp.max_T)
+    elif start is not None:
+        sol = start
     else:
         sol = Solution(set(), set(), [], ffp.max_T)
 
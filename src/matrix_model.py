@@ -0,0 +1,256 @@
+'''
+Projeto Final: Mateurística para o Problema dos Brigadistas.
+
+matrix_model.py: Construção dos modelos FFM e M-FFM pela API matricial do
+Gurobi.
+
+Disciplina:
+    MC859/MO824 - Pesquisa Operacional.
+Autores:
+    Eduardo Barros Innarelli - RA 170161
+    Victor Ferreira Ferrari  - RA 187890
+
+Universidade Estadual de Campinas - UNICAMP - 2020
+
+Modificado em: 18/10/2026
+'''
+
+import gurobipy as gp
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+
+from gurobipy import GRB
+from graph_util import csr_adjacency
+
+
+def ffm_matrix(G: nx.Graph, B: list, D: int, T: int, time: float):
+    '''
+    Constrói o FFM com as mesmas variáveis e restrições de FFM.ffm, mas
+    adicionando cada família de restrições em uma única chamada, como uma
+    matriz esparsa montada a partir da adjacência CSR do grafo.
+
+        Args:
+            G (networkx.Graph): o grafo de entrada.
+            B (list): vértices inicialmente queimados.
+            D (int): número de bombeiros disponíveis.
+            T (int): limite de iterações.
+    '''
+
+    n = G.number_of_nodes()
+    arc_v, arc_u = _arcs(G)
+
+    V = np.arange(n)
+    B = np.unique(np.asarray(B, dtype=np.int64))
+    not_B = np.setdiff1d(V, B)
+
+    # Inicializar modelo
+    model = gp.Model('ffm')
+    model.setParam('TimeLimit', time)
+
+    # Variáveis binárias b[v, t] e d[v, t], como em FFM.ffm. No modelo, a
+    # coluna de b[v, t] é v*(T+1) + t, e a de d[v, t] vem depois de todas as
+    # variáveis b.
+    b = model.addMVar((n, T+1), vtype=GRB.BINARY, name="b")
+    d = model.addMVar((n, T+1), vtype=GRB.BINARY, name="d")
+
+    cols = 2 * n * (T+1)
+    ts = np.arange(1, T+1)
+
+    def col_b(v, t):
+        return (v[:, None] * (T+1) + t[None, :]).ravel()
+
+    def col_d(v, t):
+        return n * (T+1) + col_b(v, t)
+
+    # Objetivo: maximizar quantidade de vértices salvos no instante T
+    model.setObjective(n - b[:, T].sum(), GRB.MAXIMIZE)
+
+    # Restrições (mesma ordem de FFM.ffm):
+
+    # - espalhamento do fogo pelos arcos (v, v_n), para 1 <= t <= T;
+    _add_family(model, [(col_b(arc_v, ts), 1), (col_d(arc_v, ts), 1),
+                        (col_b(arc_u, ts - 1), -1)], GRB.GREATER_EQUAL, 0,
+                cols)
+
+    # - um vértice v não é queimado e defendido no instante t;
+    _add_family(model, [(col_b(V, ts), 1), (col_d(V, ts), 1)],
+                GRB.LESS_EQUAL, 1, cols)
+
+    # - vértices queimados ou protegidos permanecem nesse estado;
+    _add_family(model, [(col_b(V, ts), 1), (col_b(V, ts - 1), -1)],
+                GRB.GREATER_EQUAL, 0, cols)
+    _add_family(model, [(col_d(V, ts), 1), (col_d(V, ts - 1), -1)],
+                GRB.GREATER_EQUAL, 0, cols)
+
+    # - limite de vértices defendidos por iteração, uma linha por instante t;
+    _add_family(model, [(col_d(np.array([v]), ts), 1) for v in V] +
+                [(col_d(np.array([v]), ts - 1), -1) for v in V],
+                GRB.LESS_EQUAL, D, cols)
+
+    # - inicializar variáveis no instante 0;
+    t0 = np.zeros(1, dtype=np.int64)
+    _add_family(model, [(col_b(B, t0), 1)], GRB.EQUAL, 1, cols)
+    _add_family(model, [(col_b(not_B, t0), 1)], GRB.EQUAL, 0, cols)
+    _add_family(model, [(col_d(V, t0), 1)], GRB.EQUAL, 0, cols)
+
+    # Colocando variáveis no modelo, indexadas por (v, t) como em FFM.ffm.
+    keys = [(v, t) for v in range(n) for t in range(T+1)]
+    model._b = gp.tupledict(zip(keys, b.reshape(-1).tolist()))
+    model._d = gp.tupledict(zip(keys, d.reshape(-1).tolist()))
+    model._T = T
+    model._horizon = T
+
+    return model
+
+
+def m_ffm_matrix(G: nx.Graph, B: list, D: int, T: int, time: float,
+                 to_B: np.ndarray):
+    '''
+    Constrói o M-FFM com as mesmas variáveis e restrições de M_FFM.m_ffm
+    (formulação esparsa), mas adicionando cada família de restrições em uma
+    única chamada, como uma matriz esparsa.
+
+        Args:
+            G (networkx.Graph): o grafo de entrada.
+            B (list): vértices inicialmente queimados.
+            D (int): número de bombeiros disponíveis.
+            T (int): limite de iterações.
+            to_B (np.ndarray): distância de cada vértice ao conjunto B.
+    '''
+
+    n = G.number_of_nodes()
+    arc_v, arc_u = _arcs(G)
+
+    is_B = np.zeros(n, dtype=bool)
+    is_B[np.asarray(B, dtype=np.int64)] = True
+    to_B = to_B.astype(np.int64)
+
+    # Vértices que podem queimar até T (R), em ordem crescente
+    R = np.flatnonzero(~is_B & (to_B <= T))
+    in_R = np.zeros(n, dtype=bool)
+    in_R[R] = True
+
+    # Colunas: b[v, t] para v em R e d(v, B) <= t <= T, seguidas de d[v, t]
+    # para v em R e 1 <= t <= T. off_b[v] é a coluna de b[v, d(v, B)], e
+    # off_d[v] a de d[v, 1].
+    b_count = T + 1 - to_B[R]
+    num_b = int(b_count.sum())
+    off_b = np.zeros(n, dtype=np.int64)
+    off_b[R] = np.cumsum(b_count) - b_count
+    off_d = np.zeros(n, dtype=np.int64)
+    off_d[R] = num_b + T * np.arange(len(R))
+    cols = num_b + T * len(R)
+
+    def col_b(v, t):
+        return off_b[v] + t - to_B[v]
+
+    def col_d(v, t):
+        return off_d[v] + t - 1
+
+    # Inicializar modelo
+    model = gp.Model('m-ffm')
+    model.setParam('TimeLimit', time)
+
+    # Variáveis binárias b[v, t] e d[v, t], como em M_FFM.m_ffm
+    end = np.full(len(R), T+1)
+    b_v, b_t = _expand(R, to_B[R], end)
+    d_v, d_t = _expand(R, np.ones(len(R), dtype=np.int64), end)
+    b = model.addMVar(num_b, vtype=GRB.BINARY,
+                      name=[f"b[{v},{t}]" for v, t in zip(b_v, b_t)])
+    d = model.addMVar(T * len(R), vtype=GRB.BINARY,
+                      name=[f"d[{v},{t}]" for v, t in zip(d_v, d_t)])
+
+    # Objetivo: maximizar quantidade de vértices salvos no instante T
+    model.setObjective(n - int(is_B.sum()) - b[col_b(R, T)].sum(),
+                       GRB.MAXIMIZE)
+
+    # Restrições (mesma ordem de M_FFM.m_ffm):
+
+    # - espalhamento do fogo pelos arcos (v, v_n), com v em R: a partir de
+    #   t = 1 se v_n está em B, e de t = d(v_n, B) + 1 caso contrário;
+    arcs = in_R[arc_v]
+    arc_v, arc_u = arc_v[arcs], arc_u[arcs]
+    from_B = is_B[arc_u]
+
+    v, t = _expand(arc_v[from_B], np.ones(from_B.sum(), dtype=np.int64),
+                   np.full(from_B.sum(), T+1))
+    _add_family(model, [(col_b(v, t), 1), (col_d(v, t), 1)],
+                GRB.GREATER_EQUAL, 1, cols)
+
+    arc_v, arc_u = arc_v[~from_B], arc_u[~from_B]
+    idx, t = _expand(np.arange(len(arc_v)), to_B[arc_u] + 1,
+                     np.full(len(arc_v), T+1))
+    v, u = arc_v[idx], arc_u[idx]
+    _add_family(model, [(col_b(v, t), 1), (col_d(v, t), 1),
+                        (col_b(u, t - 1), -1)], GRB.GREATER_EQUAL, 0, cols)
+
+    # - um vértice v não é queimado e defendido no instante t;
+    _add_family(model, [(col_b(b_v, b_t), 1), (col_d(b_v, b_t), 1)],
+                GRB.LESS_EQUAL, 1, cols)
+
+    # - vértices queimados ou protegidos permanecem nesse estado;
+    v, t = _expand(R, to_B[R] + 1, end)
+    _add_family(model, [(col_b(v, t), 1), (col_b(v, t - 1), -1)],
+                GRB.GREATER_EQUAL, 0, cols)
+    v, t = _expand(R, np.full(len(R), 2), end)
+    _add_family(model, [(col_d(v, t), 1), (col_d(v, t - 1), -1)],
+                GRB.GREATER_EQUAL, 0, cols)
+
+    # - limitar o número de vértices defendidos em t por t*D, uma linha por
+    #   instante t;
+    ts = np.arange(1, T+1)
+    if len(R) > 0:
+        _add_family(model, [(col_d(np.full(T, v), ts), 1) for v in R],
+                    GRB.LESS_EQUAL, D * ts, cols)
+
+    # Colocando variáveis no modelo, indexadas por (v, t) como em
+    # M_FFM.m_ffm. Os vértices de B não têm variáveis e estão sempre
+    # queimados.
+    model._b = gp.tupledict(zip(zip(b_v.tolist(), b_t.tolist()),
+                                b.tolist()))
+    model._d = gp.tupledict(zip(zip(d_v.tolist(), d_t.tolist()),
+                                d.tolist()))
+    model._T = T
+    model._horizon = T
+    model._burned = np.flatnonzero(is_B).tolist()
+
+    return model
+
+
+def _arcs(G: nx.Graph):
+    ''' Arcos (v, v_n) da adjacência: v_n é vizinho de v.'''
+    indptr, indices = csr_adjacency(G)
+    return np.repeat(np.arange(len(indptr) - 1), np.diff(indptr)), indices
+
+
+def _expand(owners: np.ndarray, starts: np.ndarray, stops: np.ndarray):
+    '''
+    Expande os intervalos [starts[i], stops[i]) em pares (owners[i], t), na
+    ordem dos intervalos.
+    '''
+    counts = np.maximum(stops - starts, 0)
+    first = np.cumsum(counts) - counts
+    t = np.arange(counts.sum()) - np.repeat(first - starts, counts)
+    return np.repeat(owners, counts), t
+
+
+def _add_family(model: gp.Model, terms: list, sense: str, rhs, cols: int):
+    '''
+    Adiciona ao modelo, em uma única chamada, a família de restrições
+    sum_j a_j * x[c_j[i]] (sense) rhs[i], uma para cada i, onde `terms` é a
+    lista de pares (c_j, a_j) e x são todas as variáveis do modelo.
+    '''
+
+    rows = len(terms[0][0])
+    if rows == 0:
+        return
+
+    A = sp.csr_matrix((
+        np.concatenate([np.full(rows, a, dtype=float) for _, a in terms]),
+        (np.tile(np.arange(rows), len(terms)),
+         np.concatenate([c for c, _ in terms]))
+    ), shape=(rows, cols))
+
+    model.addMConstr(A, None, sense,
+                     np.broadcast_to(np.asarray(rhs, dtype=float), rows))
@@ -0,0 +1,222 @@
+'''
+Projeto Final: Mateurística para o Problema dos Brigadistas.
+
+microbench.py: Microbenchmarks das rotinas mais custosas, em grafos
+aleatórios de tamanho crescente, com a curva de crescimento de cada uma.
+
+Disciplina:
+    MC859/MO824 - Pesquisa Operacional.
+Autores:
+    Eduardo Barros Innarelli - RA 170161
+    Victor Ferreira Ferrari  - RA 187890
+
+Universidade Estadual de Campinas - UNICAMP - 2020
+
+Modificado em: 18/10/2026
+'''
+
+import json
+from argparse import ArgumentParser
+from os.path import join
+from random import seed
+from statistics import median
+from sys import exit
+from tempfile import TemporaryDirectory
+from time import perf_counter, time
+
+import gurobipy as gp
+import networkx as nx
+import numpy as np
+
+import instance_cache
+from FFP import FFP
+from M_FFM import m_ffm
+from NatGRASP import NatGRASP
+from Solution import Solution
+from f_desc import num_of_descendants
+
+# Parâmetros do GRASP (os mesmos de main.py)
+K = 2
+ALPHA = 0.3
+
+
+def gilbert_instance(directory: str, n: int, degree: float, seed_number: int):
+    '''
+    Gera uma instância como as "gilbert" de BBGRL/GBRL: grafo G(n, p) conexo,
+    com p = degree / n (grau médio `degree`), e o vértice 0 inicialmente
+    queimado. Grafos desconexos são descartados e sorteados novamente.
+
+        Returns:
+            O caminho do arquivo da instância.
+    '''
+
+    p = min(1.0, degree / n)
+    G = nx.gnp_random_graph(n, p, seed=seed_number)
+    while not nx.is_connected(G):
+        seed_number += 1000
+        G = nx.gnp_random_graph(n, p, seed=seed_number)
+
+    filename = join(directory, f"{n}_ep{p:.4g}_0_gilbert_{seed_number}.in")
+    with open(filename, 'w') as f:
+        f.write(f"0\n{n}\n{G.number_of_edges()}\n0\n1\n0\n")
+        for u, v in G.edges:
+            f.write(f"{u} {v}\n")
+
+    return filename
+
+
+def _timed(fn, args_list: list):
+    ''' Mediana dos tempos de fn(*args) para cada args de `args_list`.'''
+    times = []
+    for args in args_list:
+        start = perf_counter()
+        fn(*args)
+        times.append(perf_counter() - start)
+    return median(times)
+
+
+def bench_instance(filename: str, D: int, repeat: int, seed_number: int,
+                   matrix: bool = False, models: bool = True):
+    '''
+    Mede as rotinas sobre uma instância. Cada medida é a mediana de `repeat`
+    execuções; as rotinas sobre soluções usam `repeat` soluções distintas da
+    heurística construtiva, de modo que as distâncias aos queimados não vêm
+    da cache do índice de distâncias. Os índices de k-bolas, por outro lado,
+    já estão preenchidos (como na busca local, após a fase construtiva).
+
+        Returns:
+            Dicionário rotina -> tempo em segundos (None se a rotina não
+            pôde ser executada, ex.: licença do Gurobi limitada).
+    '''
+
+    ffp = FFP(D, matrix=matrix)
+    n_runs = [()] * repeat
+
+    # Leitura sem cache (arquivo texto, adjacência e distâncias a B)
+    def read_input():
+        instance_cache._memory.clear()
+        ffp.read_input(filename, cache=False)
+
+    times = {'read_input': _timed(read_input, n_runs)}
+
+    # Heurística construtiva (inclui a vizinhança completa da solução)
+    seed(seed_number)
+    grasp = NatGRASP(ffp, K, num_of_descendants, 0.5, 0, time())
+    sols = []
+    times['constructive_heuristic_th'] = _timed(
+        lambda: sols.append(grasp.constructive_heuristic_th(ALPHA)), n_runs)
+
+    # k-vizinhança e ranking pelo número de descendentes
+    def k_neighborhood(sol):
+        sol.kn_bits = None
+        sol._construct_k_neighborhood(K, ffp)
+
+    def ranking(sol):
+        sol._ranking = None
+        sol.ranked_neighborhood(ffp, K, num_of_descendants)
+
+    times['_construct_k_neighborhood'] = _timed(k_neighborhood,
+                                                [(s,) for s in sols])
+    times['num_of_descendants'] = _timed(ranking, [(s,) for s in sols])
+
+    # Construção do M-FFM e tradução da solução do Gurobi
+    times['m_ffm'] = times['vars_to_solution'] = None
+    if not models:
+        return times
+
+    def build():
+        model = m_ffm(ffp.G, ffp.dist, ffp.B, D, ffp.max_T, 60, matrix)
+        model.update()
+        return model
+
+    try:
+        times['m_ffm'] = _timed(lambda: build().dispose(), n_runs)
+
+        model = build()
+        model.Params.SolutionLimit = 1
+        model.optimize()
+        if model.SolCount > 0:
+            times['vars_to_solution'] = _timed(
+                Solution.vars_to_solution, [(model, ffp.G, ffp.max_T)] * repeat)
+        model.dispose()
+    except gp.GurobiError as e:
+        print(f"  n={ffp.G.number_of_nodes()}: Gurobi error: {e}")
+
+    return times
+
+
+def growth_exponent(sizes: list, times: list):
+    '''
+    Expoente estimado do crescimento t ~ n^a (inclinação da reta ajustada em
+    escala log-log). Tamanhos sem medida são ignorados; com menos de duas
+    medidas, retorna None.
+    '''
+
+    points = [(n, t) for n, t in zip(sizes, times) if t]
+    if len(points) < 2:
+        return None
+
+    n, t = np.log(np.array(points)).T
+    return float(np.polyfit(n, t, 1)[0])
+
+
+def print_curves(curves: dict, sizes: list):
+    print(f"{'kernel':<28}" + ''.join(f"{n:>11}" for n in sizes) +
+          f"{'exponent':>10}")
+    for name, curve in curves.items():
+        times = ''.join(f"{t * 1000:>9.3f}ms" if t else f"{'-':>11}"
+                        for t in curve['times'])
+        a = curve['exponent']
+        print(f"{name:<28}{times}{'-' if a is None else f'{a:.2f}':>10}")
+
+
+if __name__ == '__main__':
+
+    # Argumentos da linha de comando
+    parser = ArgumentParser(add_help=True)
+    parser.add_argument('--sizes', nargs='+', type=int,
+                        default=[50, 100, 200, 400, 800, 1600])
+    parser.add_argument('--degree', type=float, default=8)
+    parser.add_argument('--D', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1337)
+    parser.add_argument('--matrix', action='store_true')
+    parser.add_argument('--model-max-n', type=int, default=800)
+    parser.add_argument('--max-exponent', type=float, required=False)
+    parser.add_argument('--save', type=str, required=False)
+    args = parser.parse_args()
+
+    sizes = sorted(args.sizes)
+
+    # Medir cada rotina em cada tamanho
+    results = []
+    with TemporaryDirectory() as directory:
+        for n in sizes:
+            print(f"n = {n}")
+            filename = gilbert_instance(directory, n, args.degree, args.seed)
+            results.append(bench_instance(filename, args.D, args.repeat,
+                                          args.seed, args.matrix,
+                                          n <= args.model_max_n))
+
+    # Curva de cada rotina (tempos por tamanho) e expoente de crescimento
+    curves = {}
+    for name in results[0]:
+        times = [res[name] for res in results]
+        curves[name] = {'sizes': sizes, 'times': times,
+                        'exponent': growth_exponent(sizes, times)}
+    print_curves(curves, sizes)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(curves, f, indent=2)
+
+    # Terminar com erro se alguma rotina crescer mais rápido que o permitido
+    if args.max_exponent is not None:
+        slow = [name for name, curve in curves.items()
+                if curve['exponent'] is not None and
+                curve['exponent'] > args.max_exponent]
+        for name in slow:
+            print(f"SUPERLINEAR {name}: exponent "
+                  f"{curves[name]['exponent']:.2f} > {args.max_exponent}")
+        if slow:
+            exit(1)
@@ -0,0 +1,87 @@
+'''
+Projeto Final: Mateurística para o Problema dos Brigadistas.
+
+profiling.py: Cronômetros, contadores e eventos das fases dos métodos.
+
+Disciplina:
+    MC859/MO824 - Pesquisa Operacional.
+Autores:
+    Eduardo Barros Innarelli - RA 170161
+    Victor Ferreira Ferrari  - RA 187890
+
+Universidade Estadual de Campinas - UNICAMP - 2020
+
+Modificado em: 18/10/2026
+'''
+
+from contextlib import contextmanager
+from math import isfinite
+from time import perf_counter
+
+
+class Profiler(object):
+    '''
+    Coleta tempos acumulados por fase, contadores e eventos (ex.: uma busca
+    local) de uma execução. Desabilitado, todas as operações são vazias, de
+    modo que a instrumentação pode ficar sempre no código.
+    '''
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        ''' Descarta o que foi coletado (início de uma nova execução).'''
+        self.times = {}
+        self.counters = {}
+        self.events = []
+
+    @contextmanager
+    def timer(self, name: str):
+        ''' Acumula em `name` o tempo gasto no bloco `with`.'''
+        if not self.enabled:
+            yield
+            return
+
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float):
+        if self.enabled:
+            self.times[name] = self.times.get(name, 0.0) + seconds
+
+    def count(self, name: str, k: int = 1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + k
+
+    def event(self, name: str, **fields):
+        if self.enabled:
+            self.events.append({'event': name, **fields})
+
+    def solve_event(self, name: str, model, **fields):
+        '''
+        Registra a resolução de um modelo do Gurobi: tempo de resolução,
+        status, gap, limitante, nós explorados e valor objetivo, além de
+        `fields`. Valores infinitos (ex.: gap com incumbente nula) são
+        registrados como None, pois o JSON não os representa.
+        '''
+        if not self.enabled:
+            return
+
+        self.add_time('gurobi', model.Runtime)
+        found = model.SolCount > 0
+        gap, bound = (model.MIPGap, model.ObjBound) if found else (None, None)
+        self.event(name, runtime=round(model.Runtime, 4),
+                   status=model.Status, nodes=int(model.NodeCount),
+                   gap=gap if found and isfinite(gap) else None,
+                   bound=bound if found and isfinite(bound) else None,
+                   obj=model.ObjVal if found else None, **fields)
+
+    def report(self):
+        ''' Dicionário com tudo que foi coletado, serializável em JSON.'''
+        return {'times': {k: round(v, 4) for k, v in self.times.items()},
+                'counters': dict(self.counters),
+                'events': list(self.events)}
@@ -0,0 +1,113 @@
+'''
+Projeto Final: Mateurística para o Problema dos Brigadistas.
+
+reduction.py: Redução exata da instância antes da construção dos modelos e
+tradução das soluções da instância reduzida para a original.
+
+Disciplina:
+    MC859/MO824 - Pesquisa Operacional.
+Autores:
+    Eduardo Barros Innarelli - RA 170161
+    Victor Ferreira Ferrari  - RA 187890
+
+Universidade Estadual de Campinas - UNICAMP - 2020
+
+Modificado em: 18/10/2026
+'''
+
+import numpy as np
+from networkx import Graph
+
+from graph_util import csr_adjacency, DistanceIndex
+from Solution import Solution
+
+
+class Reduction(object):
+    '''
+    Instância reduzida de um FFP, obtida por regras que não alteram o ótimo
+    para o limite de iterações T da instância:
+
+    - vértices com d(v, B) > T (inclusive os inalcançáveis a partir de B)
+      não queimam até T, e são removidos e contados como salvos;
+    - os vértices de B, queimados desde o instante 0, são contraídos em uma
+      única fonte (vértice 0 da instância reduzida), adjacente aos vizinhos
+      de B. As arestas internas a B são descartadas.
+
+    As distâncias dos vértices mantidos à fonte são as mesmas que a B, pois
+    todo caminho mínimo até B passa apenas por vértices mais próximos de B
+    (também mantidos). O vértice i > 0 da instância reduzida é o vértice
+    `vertices[i-1]` da original.
+    '''
+
+    def __init__(self, ffp, T: int = None):
+        '''
+            Args:
+                ffp (FFP): instância original, já lida.
+                T   (int): limite de iterações (padrão: o da instância).
+        '''
+
+        self.T = ffp.max_T if T is None else T
+        self.n = ffp.G.number_of_nodes()
+        self.B = np.unique(np.asarray(ffp.B, dtype=np.int64))
+
+        # Vértices mantidos (além da fonte)
+        to_B = ffp.dist.to_B
+        is_B = np.zeros(self.n, dtype=bool)
+        is_B[self.B] = True
+        self.vertices = np.flatnonzero(~is_B & (to_B <= self.T))
+
+        # Rótulos na instância reduzida (-1 para vértices removidos)
+        label = np.full(self.n, -1, dtype=np.int64)
+        label[self.B] = 0
+        label[self.vertices] = np.arange(1, len(self.vertices) + 1)
+
+        # Arestas entre vértices mantidos (sem as internas à fonte)
+        edges = label[np.array(ffp.G.edges, dtype=np.int64).reshape(-1, 2)]
+        edges = edges[(edges >= 0).all(axis=1) & (edges.max(axis=1) > 0)]
+
+        G = Graph()
+        G.add_nodes_from(range(len(self.vertices) + 1))
+        G.add_edges_from(edges.tolist())
+
+        indptr, indices = csr_adjacency(G)
+        dist = DistanceIndex(indptr, indices, [0], to_B=np.concatenate(
+            ([0], to_B[self.vertices])).astype(to_B.dtype))
+
+        self.ffp = type(ffp)(ffp.D, matrix=ffp.matrix)
+        self.ffp.load(G, [0], indptr, indices, dist)
+        self.ffp.max_T = self.T
+        self.ffp.limit = ffp.time_limit()
+        self.ffp.profiler = ffp.profiler
+        self.ffp.monitor = ffp.monitor
+
+    def lift(self, sol: Solution):
+        '''
+        Traduz uma solução da instância reduzida para a original: a fonte
+        corresponde aos vértices de B e os vértices removidos ficam
+        intocados (salvos).
+        '''
+
+        # Sem solução (ex.: modelo sem solução no limite de tempo)
+        if sol.n == 0:
+            return sol
+
+        its = np.full(self.n, -1, dtype=np.int64)
+        its[self.vertices] = sol.its[1:]
+        its[self.B] = 0
+
+        defended = np.zeros(self.n, dtype=bool)
+        v = sol.defended_vertices()
+        defended[self.vertices[v[v > 0] - 1]] = True
+
+        burned = np.zeros(self.n, dtype=bool)
+        v = sol.burned_vertices()
+        burned[self.vertices[v[v > 0] - 1]] = True
+        burned[self.B] = True
+
+        # O custo cresce com os vértices removidos; o gap absoluto é o mesmo
+        cost = self.n - int(np.count_nonzero(burned))
+        gap = sol.gap
+        if gap is not None and sol.cost > 0:
+            gap = gap * sol.cost / cost
+
+        return Solution(defended, burned, its, sol.T, cost, sol.optimal, gap)
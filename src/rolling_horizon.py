@@ -0,0 +1,116 @@
+'''
+Projeto Final: Mateurística para o Problema dos Brigadistas.
+
+rolling_horizon.py: Resolução do FFP por horizonte rolante sobre o M-FFM,
+para instâncias com limite de iterações grande.
+
+Disciplina:
+    MC859/MO824 - Pesquisa Operacional.
+Autores:
+    Eduardo Barros Innarelli - RA 170161
+    Victor Ferreira Ferrari  - RA 187890
+
+Universidade Estadual de Campinas - UNICAMP - 2020
+
+Modificado em: 18/10/2026
+'''
+
+from math import ceil
+from time import time
+
+import numpy as np
+from networkx import Graph
+
+from callbacks import optimize
+from FFP import FFP
+from FireSpread import FireSpread
+from graph_util import csr_adjacency, DistanceIndex
+from M_FFM import m_ffm
+from Solution import Solution
+
+
+def rolling_horizon(ffp: FFP, window: int, step: int, time_limit: float):
+    '''
+    Horizonte rolante: a partir do estado atual do fogo, resolve o M-FFM
+    apenas para as próximas `window` iterações, fixa as defesas das
+    primeiras `step` delas, avança a simulação e repete, até o fogo ser
+    contido. Cada modelo tem variáveis só para os vértices a até `window`
+    iterações do fogo, de modo que a memória não cresce com ceil(n/D).
+
+    O modelo de cada janela é construído sobre o grafo sem as arestas dos
+    vértices já defendidos, com todos os vértices queimados como conjunto
+    inicial (todo vizinho de um vértice queimado antes da última iteração já
+    foi tocado, então apenas a fronteira do fogo se espalha).
+
+        Args:
+            ffp        (FFP): instância do problema, já lida.
+            window     (int): número de iterações de cada modelo.
+            step       (int): número de iterações fixadas por janela
+                              (1 <= step <= window).
+            time_limit (float): limite de tempo total.
+        Returns:
+            A solução e o tempo de execução.
+    '''
+
+    assert window >= 1 and step >= 1, "window e step devem ser positivos"
+
+    start_time = time()
+    step = min(step, window)
+
+    n = ffp.G.number_of_nodes()
+    D = ffp.D
+    edges = np.array(ffp.G.edges, dtype=np.int64).reshape(-1, 2)
+
+    spread = FireSpread(ffp.indptr, ffp.indices, ffp.B)
+    defended = np.zeros(n, dtype=bool)
+
+    while len(spread.threatened()) > 0:
+        ffp.profiler.count('windows')
+
+        # Grafo sem as arestas dos vértices defendidos (isolados, eles não
+        # têm variáveis no modelo)
+        burned = spread.burned()
+        G = Graph()
+        G.add_nodes_from(range(n))
+        G.add_edges_from(edges[~(defended[edges[:, 0]] |
+                                 defended[edges[:, 1]])].tolist())
+        indptr, indices = csr_adjacency(G)
+        dist = DistanceIndex(indptr, indices, burned.tolist())
+
+        # Tempo da janela: o restante dividido pelo número de janelas
+        # necessárias para o fogo alcançar, no grafo atual, o vértice
+        # alcançável mais distante
+        remaining = time_limit - (time() - start_time)
+        depth = int(dist.to_B[dist.to_B < n].max())
+        window_time = max(0, remaining / max(1, ceil(depth / step)))
+
+        with ffp.profiler.timer('model_build'):
+            model = m_ffm(G, dist, burned.tolist(), D, window, window_time,
+                          ffp.matrix)
+            model.update()
+        optimize(model, ffp.monitor, stop=False, solve='window', t=spread.t)
+        ffp.profiler.solve_event('window', model, t=spread.t)
+
+        if model.SolCount > 0:
+            schedule = Solution.vars_to_solution(model, G, window).schedule(
+                D, window)
+        else:
+            # Sem solução no limite de tempo: defender D ameaçados
+            schedule = [spread.threatened()[:D]]
+        model.dispose()
+
+        # Fixar as defesas das primeiras iterações da janela
+        for defend in schedule[:step]:
+            defend = defend[spread.state[defend] != FireSpread.BURNED]
+            defended[defend] = True
+            spread.step(defend)
+            if len(spread.threatened()) == 0:
+                break
+
+    sol = Solution(defended=spread.state == FireSpread.DEFENDED,
+                   burned=spread.state == FireSpread.BURNED,
+                   iterations=spread.its, T=spread.t, optimal=False)
+    sol.calculate_cost(ffp.G)
+
+    return sol, time() - start_time
+